@@ -1,16 +1,34 @@
 import os
 import json
+import hashlib
+import hmac
 import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, has_request_context, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.middleware.proxy_fix import ProxyFix
-from openai import OpenAI
+from openai import (
+    APIConnectionError, DEFAULT_CONNECTION_LIMITS, DefaultHttpxClient, InternalServerError, OpenAI, RateLimitError, Timeout
+)
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
 import jwt
+import numpy as np
 from email_validator import validate_email, EmailNotValidError
 
 # Configure logging for debugging
@@ -47,28 +65,129 @@ db.init_app(app)
 # Enable CORS for all routes
 CORS(app)
 
-# Initialize OpenAI client
+# Initialize OpenAI client (behind the AI gateway: create_chat_completion)
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+AI_CALL_DEADLINES_SECONDS = {  # Total time per call site, retries included
+    'parse': 15,
+    'estimate': 15,
+    'parse_estimate': 20,
+    'suggestions': 25,
+    'portion': 10,
+}
+AI_MAX_ATTEMPTS = 3  # First try plus retries on timeouts, connection errors, 429s and 5xx
+AI_RETRY_BASE_DELAY_SECONDS = 0.5  # Full jitter: retry n sleeps uniform(0, base * 2**n)
+AI_CONNECT_TIMEOUT_SECONDS = 3
+AI_HTTP_MAX_CONNECTIONS = int(os.environ.get("AI_HTTP_MAX_CONNECTIONS", "100"))  # Connection pool size per worker process
+AI_HTTP_MAX_KEEPALIVE_CONNECTIONS = 20  # Idle connections kept open for reuse
+AI_HTTP_KEEPALIVE_EXPIRY_SECONDS = 30
+# Limits/Timeout classes of the HTTP client openai itself is built on, so no direct httpx dependency
+ConnectionLimits = type(DEFAULT_CONNECTION_LIMITS)
+openai_client = OpenAI(
+    api_key=OPENAI_API_KEY,
+    max_retries=0,  # Retries are done by the gateway, within each call site's deadline
+    timeout=Timeout(max(AI_CALL_DEADLINES_SECONDS.values()), connect=AI_CONNECT_TIMEOUT_SECONDS),
+    http_client=DefaultHttpxClient(limits=ConnectionLimits(
+        max_connections=AI_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=AI_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=AI_HTTP_KEEPALIVE_EXPIRY_SECONDS
+    ))
+) if OPENAI_API_KEY else None
+
+# AI circuit breaker: when OpenAI is failing or slow, /calculate-gl and /parse-meal-smart run database-only
+AI_BREAKER_WINDOW_SECONDS = 60  # Recent calls considered
+AI_BREAKER_MIN_CALLS = 10  # Don't trip on fewer calls than this
+AI_BREAKER_FAILURE_RATE = 0.5  # Open when this share of recent calls failed...
+AI_BREAKER_SLOW_CALL_SECONDS = 10
+AI_BREAKER_SLOW_CALL_RATE = 0.5  # ...or took longer than AI_BREAKER_SLOW_CALL_SECONDS
+AI_BREAKER_OPEN_SECONDS = 30  # Stay degraded this long, then let one probe call through
 
 # JWT configuration (uses same SESSION_SECRET for consistency)
 JWT_SECRET = SESSION_SECRET
 JWT_EXPIRY_HOURS = 24
 
+# Signed nutrition tokens: AI estimates chosen on /review are trusted by /calculate-gl without re-estimating
+NUTRITION_TOKEN_EXPIRY_HOURS = 24
+NUTRITION_TOKEN_AUDIENCE = 'gicalc:nutrition'  # Login token decoding rejects tokens with an audience, so these can't authenticate
+
 # Daily meal limit per user
 DAILY_MEAL_LIMIT = 4
 
 # Per-minute rate limiting configuration
 REQUESTS_PER_MINUTE = 10
-request_timestamps = {}  # {user_id: [timestamp1, timestamp2, ...]}
+
+# Rate limiter backend: 'memory' (per worker process) or 'database' (shared by every worker and instance)
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SWEEP_INTERVAL_SECONDS = 60  # Idle counters are dropped this often
 
 # AI response cache for nutrition estimates (reduces OpenAI API costs)
 ai_nutrition_cache = {}  # {food_name_lower: {data: {...}, cached_at: datetime}}
 AI_CACHE_EXPIRY_HOURS = 24  # Cache AI responses for 24 hours
+AI_CACHE_REFRESH_AHEAD_HOURS = 2  # Entries this close to expiry are refreshed in the background
+AI_CACHE_STALE_GRACE_HOURS = 1  # Expired entries are still served (while refreshing) for this long
+
+# Concurrent AI lookups (per-item estimations run in parallel instead of back-to-back)
+# Under the gevent worker (gunicorn.conf.py) these threads are greenlets, so the cap can be raised a lot
+AI_LOOKUP_MAX_WORKERS = int(os.environ.get("AI_LOOKUP_MAX_WORKERS", "8"))  # Upper bound on in-flight OpenAI calls per worker process
+AI_LOOKUP_DEADLINE_SECONDS = 20  # Per-request budget; slower lookups are dropped from the response
+ai_lookup_executor = ThreadPoolExecutor(max_workers=AI_LOOKUP_MAX_WORKERS, thread_name_prefix='ai-lookup')
+NUTRITION_BATCH_MAX_ITEMS = 10  # Unknown foods estimated per OpenAI call in /calculate-gl; larger meals are split
+NUTRITION_BATCH_TOKENS_PER_ITEM = 120  # max_tokens budget per food in a batched estimate
+
+# Single-flight: concurrent misses for the same food share one in-flight OpenAI call
+ai_inflight_calls = {}  # {(lookup_kind, food_name_lower): Future}
+ai_inflight_lock = threading.Lock()
+
+# Meal parse result cache (same text -> same parse, no GPT call)
+PARSE_CACHE_MAX_ENTRIES = 5000
+PARSE_CACHE_TTL_HOURS = 6  # Below NUTRITION_TOKEN_EXPIRY_HOURS so cached ai_option tokens stay valid
+PARSE_CACHE_SHARED = True  # Also store parse results in the database for other workers
+PARSE_CACHE_PURGE_INTERVAL_SECONDS = 3600  # Expired shared rows are deleted this often (and on every catalog publish)
+
+# Fused /parse-meal-smart: one completion parses the meal and estimates its non-catalog foods
+SMART_PARSE_FUSED = os.environ.get("SMART_PARSE_FUSED", "true").lower() == "true"  # "false" restores parse, then one estimate per item
+SMART_PARSE_FUSED_MAX_TOKENS = 1500
+SMART_PARSE_FUSED_MAX_CANDIDATES = 40  # Catalog names sent with a fused parse (candidates for the unresolved spans only)
+
+# Meal suggestion cache (keyed by sorted foods + bucketed GL)
+SUGGESTIONS_CACHE_MAX_ENTRIES = 2000
+SUGGESTIONS_CACHE_TTL_HOURS = 24
+SUGGESTIONS_GL_BUCKET_SIZE = 5  # Meals whose total GL falls in the same 5-point bucket share suggestions
+
+# Background meal suggestion jobs (/calculate-gl returns a job id instead of waiting on GPT)
+SUGGESTIONS_JOB_MAX_WORKERS = 4  # Concurrent suggestion jobs per worker process
+SUGGESTIONS_JOB_TTL_SECONDS = 3600  # Finished jobs can be fetched for this long
+SUGGESTIONS_JOB_MAX_FUTURES = 1000  # Job futures kept per worker for long polls; evicted jobs are polled from the table
+SUGGESTIONS_LONG_POLL_MAX_SECONDS = 20  # Upper bound on ?wait= for GET /suggestions/<job_id>
+SUGGESTIONS_POLL_INTERVAL_SECONDS = 0.5  # Table re-check interval when the job runs on another worker
+suggestions_executor = ThreadPoolExecutor(max_workers=SUGGESTIONS_JOB_MAX_WORKERS, thread_name_prefix='suggestions')
+
+# Auth user cache (token subject -> user, so hot endpoints skip the users lookup)
+AUTH_USER_CACHE_MAX_ENTRIES = 10000
+AUTH_USER_CACHE_TTL_SECONDS = 60  # A deleted account keeps authenticating for at most this long
+AUTH_MISSING_USER_CACHE_TTL_SECONDS = 30  # Tokens for unknown users are rejected without a query for this long
+
+# Batch GL scoring limits (per /calculate-gl/batch request)
+BATCH_MAX_MEALS = 5000
+BATCH_MAX_ITEMS = 100000
+MAX_ITEM_QUANTITY = 1000  # Servings per food item; larger (or nan/inf) quantities are invalid_quantity
+
+# Prometheus metrics (/metrics). Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) aggregates all workers
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")  # Scrapers send "Authorization: Bearer <token>"; unset disables /metrics
+METRICS_PUBLIC = os.environ.get("METRICS_PUBLIC", "false").lower() == "true"  # Serve /metrics without a token (only behind a private network)
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Password hashing (KDF runs in a process pool, not on the request thread)
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")  # werkzeug method string; raise the cost as hardware allows
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))  # Per worker process; gunicorn.conf.py splits the CPUs between workers
+PASSWORD_HASH_MAX_PENDING = PASSWORD_HASH_WORKERS * 4  # Hash/verify jobs queued beyond this are turned away with 503
+PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = 2  # How long a request waits for a free slot before giving up
+password_hash_executor = None  # ProcessPoolExecutor, created on first use in each worker
+password_hash_executor_lock = threading.Lock()
+password_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+password_hash_prefix = None  # "method:params" werkzeug writes for PASSWORD_HASH_METHOD, from one sample hash
 
 # Anti-bot: IP-based registration limits
 IP_REGISTRATIONS_PER_DAY = 3
-ip_registration_tracker = {}  # {ip: [datetime1, datetime2, ...]}
 
 # Anti-bot: Minimum registration time (seconds) - reject if form submitted too fast
 MIN_REGISTRATION_TIME_SECONDS = 3
@@ -104,9 +223,19 @@ DISPOSABLE_EMAIL_DOMAINS = {
     'safetymail.info', 'safetypost.de', 'sandelf.de', 'saynotospams.com'
 }
 
-# Global variable to store food database
-food_database = []
-food_lookup = {}
+# Food catalog: one immutable FoodCatalog snapshot (foods plus every matching index), replaced as a whole on reload
+FOOD_CATALOG_PATH = os.environ.get("FOOD_CATALOG_PATH", "attached_assets/food_items_db_1753605645874.json")
+CATALOG_RELOAD_CHECK_SECONDS = int(os.environ.get("CATALOG_RELOAD_CHECK_SECONDS", "30"))  # File and reload-signal poll interval per worker; 0 turns the watcher off
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")  # Bearer token for /admin endpoints; unset disables them
+food_catalog = None  # FoodCatalog, published by load_food_database
+catalog_source_signature = None  # File signature the published catalog was read from (kept outside the immutable snapshot)
+catalog_failed_signature = None  # File signature that last failed to load; not retried until the file changes
+catalog_reload_lock = threading.Lock()  # One reload at a time per worker
+
+# Fuzzy matching (misspellings like "jowar rotti" resolve locally instead of via GPT)
+FUZZY_MATCH_THRESHOLD = 0.8  # Minimum score (0-1) to resolve to a curated food without AI
+FUZZY_MATCH_MARGIN = 0.05  # Best score must beat the runner-up food by this much
+FUZZY_MATCH_CANDIDATES = 10  # Top trigram candidates re-scored with edit distance
 
 
 # ============================================
@@ -124,10 +253,14 @@ class User(db.Model):
     meal_usages = db.relationship('MealUsage', backref='user', lazy='dynamic')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """True if the stored hash was made with a different method or cost than PASSWORD_HASH_METHOD"""
+        return self.password_hash.split('$', 1)[0] != get_password_hash_prefix()
     
     def to_dict(self):
         return {
@@ -146,6 +279,753 @@ class MealUsage(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 
+class DailyUsageCounter(db.Model):
+    """Per-user-per-day meal count, incremented atomically; meal_usages stays the audit log"""
+    __tablename__ = 'daily_usage_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    usage_date = db.Column(db.Date, primary_key=True)  # UTC day
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SuggestionJob(db.Model):
+    """Background meal suggestion job; the result is readable from any worker or instance"""
+    __tablename__ = 'suggestion_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='pending')  # 'pending' or 'done'
+    suggestions = db.Column(db.Text)  # JSON-encoded suggestions once done
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class RateLimitCounter(db.Model):
+    """Shared sliding-window counter used by the 'database' rate limiter backend"""
+    __tablename__ = 'rate_limit_counters'
+    
+    key = db.Column(db.String(200), primary_key=True)  # e.g. 'minute:42', 'register-ip:1.2.3.4'
+    window_index = db.Column(db.BigInteger, nullable=False)  # int(now / window_seconds) of the current window
+    current_count = db.Column(db.Integer, nullable=False, default=0)
+    previous_count = db.Column(db.Integer, nullable=False, default=0)
+    expires_at = db.Column(db.Float, nullable=False, index=True)  # Unix time after which both windows are stale
+
+
+class AINutritionCacheEntry(db.Model):
+    """Persistent tier of ai_nutrition_cache, shared by every worker and instance"""
+    __tablename__ = 'ai_nutrition_cache'
+    
+    food_name = db.Column(db.String(200), primary_key=True)  # Normalized (lowercase, stripped)
+    data = db.Column(db.Text, nullable=False)  # JSON-encoded nutrition data
+    cached_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class CatalogState(db.Model):
+    """Reload signal shared by every worker and instance (single row, id 1)"""
+    __tablename__ = 'catalog_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)  # Bumped by POST /admin/catalog/reload
+    version = db.Column(db.String(16), nullable=False, default='')  # Catalog version the reload published
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ParseResultCacheEntry(db.Model):
+    """Shared tier of the meal parse result cache"""
+    __tablename__ = 'parse_result_cache'
+    
+    cache_key = db.Column(db.String(64), primary_key=True)  # sha256 of endpoint, catalog version and normalized text
+    catalog_version = db.Column(db.String(16), nullable=False, default='', index=True)  # So superseded versions can be purged
+    data = db.Column(db.Text, nullable=False)  # JSON-encoded parse result
+    cached_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+# ============================================
+# CACHE HELPERS
+# ============================================
+
+class BoundedTTLCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters"""
+    
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # {key: (expires_at, value)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+parse_result_cache = BoundedTTLCache(PARSE_CACHE_MAX_ENTRIES, PARSE_CACHE_TTL_HOURS * 3600)
+suggestion_job_futures = BoundedTTLCache(SUGGESTIONS_JOB_MAX_FUTURES, SUGGESTIONS_JOB_TTL_SECONDS)  # {job_id: Future} for jobs started here
+suggestions_cache = BoundedTTLCache(SUGGESTIONS_CACHE_MAX_ENTRIES, SUGGESTIONS_CACHE_TTL_HOURS * 3600)
+auth_user_cache = BoundedTTLCache(AUTH_USER_CACHE_MAX_ENTRIES, AUTH_USER_CACHE_TTL_SECONDS)
+auth_missing_user_cache = BoundedTTLCache(AUTH_USER_CACHE_MAX_ENTRIES, AUTH_MISSING_USER_CACHE_TTL_SECONDS)
+
+
+def normalize_meal_text(meal_text):
+    """Canonical form of meal text for cache keys: case, whitespace, punctuation, separators and numbers"""
+    text = meal_text.casefold()
+    for fraction, replacement in UNICODE_FRACTIONS.items():
+        text = text.replace(fraction, replacement)
+    text = MEAL_SEPARATOR_PATTERN.sub(' , ', text)
+    # Only ASCII punctuation is folded: non-Latin letters and their vowel signs are part of the food name
+    text = re.sub(r"(?=[\x00-\x7f])[^a-z0-9\s,./]", " ", text)
+    text = re.sub(r"(?<![\d])\.|\.(?![\d])", " ", text)  # Keep only decimal points
+    
+    words = []
+    for word in text.split():
+        if re.fullmatch(r"\d+(\.\d+)?", word):
+            word = str(format_quantity(float(word)))
+        elif word in NUMBER_WORDS and NUMBER_WORDS[word] >= 1 and word not in ('a', 'an'):
+            word = str(format_quantity(NUMBER_WORDS[word]))
+        if word == ',' and (not words or words[-1] == ','):
+            continue
+        words.append(word)
+    
+    return " ".join(words).strip(' ,')
+
+
+def parse_cache_key(endpoint, meal_text, catalog):
+    """Cache key for a parse result; includes the catalog version so catalog changes invalidate it.
+    
+    None (don't cache) when nothing is left after normalizing, so such texts never share a key.
+    """
+    normalized_text = normalize_meal_text(meal_text)
+    if not normalized_text:
+        return None
+    raw_key = f"{endpoint}|{catalog.version}|{normalized_text}"
+    return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+
+def release_db_connection():
+    """End the current read transaction so the pooled connection isn't held while waiting on OpenAI"""
+    db.session.commit()
+
+
+def get_cached_parse_result(cache_key):
+    """Look up a parse result in-process, then in the shared table"""
+    if cache_key is None:
+        return None
+    
+    result = parse_result_cache.get(cache_key)
+    if result is not None or not PARSE_CACHE_SHARED:
+        return result
+    
+    try:
+        entry = db.session.get(ParseResultCacheEntry, cache_key)
+        cached = (entry.cached_at, entry.data) if entry else None
+        release_db_connection()
+        if cached and datetime.utcnow() - cached[0] < timedelta(hours=PARSE_CACHE_TTL_HOURS):
+            result = json.loads(cached[1])
+            parse_result_cache.set(cache_key, result)
+            return result
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error reading shared parse cache: {e}")
+    return None
+
+
+def store_parse_result(cache_key, result, catalog_version):
+    """Cache a parse result in-process and (optionally) in the shared table"""
+    if cache_key is None:
+        return
+    
+    parse_result_cache.set(cache_key, result)
+    if not PARSE_CACHE_SHARED:
+        return
+    
+    try:
+        db.session.merge(ParseResultCacheEntry(
+            cache_key=cache_key,
+            catalog_version=catalog_version,
+            data=json.dumps(result),
+            cached_at=datetime.utcnow()
+        ))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error writing shared parse cache: {e}")
+
+
+def purge_parse_result_cache(catalog_version=None):
+    """Delete shared parse cache rows past PARSE_CACHE_TTL_HOURS and, given a catalog version, rows for any other version"""
+    if not PARSE_CACHE_SHARED:
+        return 0
+    
+    with app.app_context():
+        try:
+            stale = ParseResultCacheEntry.cached_at < datetime.utcnow() - timedelta(hours=PARSE_CACHE_TTL_HOURS)
+            if catalog_version is not None:
+                stale = or_(stale, ParseResultCacheEntry.catalog_version != catalog_version)
+            removed = ParseResultCacheEntry.query.filter(stale).delete(synchronize_session=False)
+            db.session.commit()
+            return removed
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error purging shared parse cache: {e}")
+            return 0
+
+
+def ensure_parse_cache_schema():
+    """Recreate the shared parse cache table if it predates the catalog_version column (it only holds cache rows)"""
+    columns = {column['name'] for column in inspect(db.engine).get_columns(ParseResultCacheEntry.__tablename__)}
+    if 'catalog_version' not in columns:
+        app.logger.info("Recreating parse_result_cache table with a catalog_version column")
+        ParseResultCacheEntry.__table__.drop(db.engine, checkfirst=True)
+        ParseResultCacheEntry.__table__.create(db.engine, checkfirst=True)
+
+
+# ============================================
+# RATE LIMITING
+# ============================================
+
+def roll_window(counter_window, current_count, previous_count, window_index):
+    """Shift a counter's (current, previous) counts forward to window_index"""
+    if counter_window == window_index:
+        return current_count, previous_count
+    if counter_window == window_index - 1:
+        return 0, current_count
+    return 0, 0
+
+
+def sliding_window_count(current_count, previous_count, now, window_seconds):
+    """Requests seen in the last window_seconds, weighting the previous window by its remaining overlap"""
+    elapsed_fraction = now / window_seconds - int(now / window_seconds)
+    return current_count + previous_count * (1 - elapsed_fraction)
+
+
+class InMemoryRateLimiter:
+    """Sliding-window counters held in this worker process (fixed size per key, idle keys swept)"""
+    
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.counters = {}  # {key: [window_index, current_count, previous_count, expires_at]}
+        self.lock = threading.Lock()
+    
+    def apply(self, key, limit, window_seconds, increment):
+        """Count a request against key if increment and under limit; returns (allowed, count)"""
+        now = self.clock()
+        window_index = int(now / window_seconds)
+        
+        with self.lock:
+            counter = self.counters.get(key)
+            if counter:
+                current_count, previous_count = roll_window(counter[0], counter[1], counter[2], window_index)
+            else:
+                current_count, previous_count = 0, 0
+            
+            count = sliding_window_count(current_count, previous_count, now, window_seconds)
+            allowed = limit is None or count < limit
+            if allowed and increment:
+                current_count += 1
+                count += 1
+            
+            if current_count or previous_count:
+                self.counters[key] = [window_index, current_count, previous_count, (window_index + 2) * window_seconds]
+        
+        return allowed, math.ceil(count)
+    
+    def sweep(self):
+        """Drop counters whose windows have both expired; returns how many were removed"""
+        now = self.clock()
+        with self.lock:
+            stale_keys = [key for key, counter in self.counters.items() if counter[3] <= now]
+            for key in stale_keys:
+                del self.counters[key]
+        return len(stale_keys)
+    
+    def size(self):
+        return len(self.counters)
+
+
+class DatabaseRateLimiter:
+    """Sliding-window counters in the rate_limit_counters table, enforced across workers and instances"""
+    
+    def __init__(self, clock=time.time):
+        self.clock = clock
+    
+    def apply(self, key, limit, window_seconds, increment):
+        """Count a request against key if increment and under limit; returns (allowed, count)"""
+        now = self.clock()
+        window_index = int(now / window_seconds)
+        
+        for attempt in range(2):
+            try:
+                counter = db.session.get(RateLimitCounter, key, with_for_update=True)
+                if counter:
+                    current_count, previous_count = roll_window(
+                        counter.window_index, counter.current_count, counter.previous_count, window_index
+                    )
+                else:
+                    current_count, previous_count = 0, 0
+                
+                count = sliding_window_count(current_count, previous_count, now, window_seconds)
+                allowed = limit is None or count < limit
+                if allowed and increment:
+                    current_count += 1
+                    count += 1
+                
+                if not counter and not current_count:
+                    return allowed, math.ceil(count)
+                if not counter:
+                    counter = RateLimitCounter(key=key)
+                    db.session.add(counter)
+                counter.window_index = window_index
+                counter.current_count = current_count
+                counter.previous_count = previous_count
+                counter.expires_at = (window_index + 2) * window_seconds
+                db.session.commit()
+                return allowed, math.ceil(count)
+            except IntegrityError:
+                # Another worker created the row first; retry against it
+                db.session.rollback()
+        
+        app.logger.error(f"Rate limiter could not update counter {key}; allowing request")
+        return True, 0
+    
+    def sweep(self):
+        """Delete counters whose windows have both expired; returns how many were removed"""
+        removed = RateLimitCounter.query.filter(RateLimitCounter.expires_at <= self.clock()).delete()
+        db.session.commit()
+        return removed
+    
+    def size(self):
+        return RateLimitCounter.query.count()
+
+
+def create_rate_limiter(backend):
+    """Build the rate limiter for RATE_LIMIT_BACKEND"""
+    if backend == 'database':
+        return DatabaseRateLimiter()
+    if backend != 'memory':
+        app.logger.warning(f"Unknown RATE_LIMIT_BACKEND {backend!r}; using in-process counters")
+    return InMemoryRateLimiter()
+
+
+rate_limiter = create_rate_limiter(RATE_LIMIT_BACKEND)
+
+
+def run_rate_limit_sweeper():
+    """Periodically drop idle rate limit counters so memory/rows track active keys only.
+    
+    Also deletes expired shared parse cache rows every PARSE_CACHE_PURGE_INTERVAL_SECONDS.
+    """
+    last_parse_cache_purge = time.monotonic()
+    while True:
+        time.sleep(RATE_LIMIT_SWEEP_INTERVAL_SECONDS)
+        try:
+            with app.app_context():
+                removed = rate_limiter.sweep()
+            if removed:
+                app.logger.debug(f"Rate limit sweeper removed {removed} idle counters")
+            if time.monotonic() - last_parse_cache_purge >= PARSE_CACHE_PURGE_INTERVAL_SECONDS:
+                last_parse_cache_purge = time.monotonic()
+                purged = purge_parse_result_cache()
+                if purged:
+                    app.logger.debug(f"Parse cache purge removed {purged} expired rows")
+            # Keeps each worker's size gauges current between scrapes
+            update_metric_gauges()
+        except Exception as e:
+            app.logger.error(f"Rate limit sweep failed: {e}")
+
+
+def start_rate_limit_sweeper():
+    """Start the background sweeper thread for this worker process"""
+    sweeper = threading.Thread(target=run_rate_limit_sweeper, name='rate-limit-sweeper', daemon=True)
+    sweeper.start()
+
+
+# ============================================
+# METRICS
+# ============================================
+
+REQUEST_LATENCY = Histogram(
+    'gicalc_http_request_duration_seconds', 'Request latency by endpoint',
+    ['endpoint', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+)
+REQUESTS_TOTAL = Counter('gicalc_http_requests_total', 'Requests by endpoint and status', ['endpoint', 'method', 'status'])
+DB_QUERIES_PER_REQUEST = Histogram(
+    'gicalc_db_queries_per_request', 'SQL statements executed while handling a request',
+    ['endpoint'],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 50)
+)
+OPENAI_LATENCY = Histogram(
+    'gicalc_openai_request_duration_seconds', 'OpenAI chat completion latency by call site',
+    ['call_site', 'outcome'],
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30)
+)
+OPENAI_TOKENS = Counter('gicalc_openai_tokens_total', 'OpenAI tokens used by call site', ['call_site', 'kind'])
+OPENAI_RETRIES = Counter('gicalc_openai_retries_total', 'OpenAI calls retried after a transient error', ['call_site'])
+OPENAI_SHORT_CIRCUITS = Counter('gicalc_openai_short_circuited_total', 'OpenAI calls refused because the circuit breaker was open', ['call_site'])
+AI_CIRCUIT_OPENS = Counter('gicalc_ai_circuit_opens_total', 'Times the AI circuit breaker tripped open')
+AI_CIRCUIT_STATE = Gauge(
+    'gicalc_ai_circuit_state', 'AI circuit breaker state per worker (0 closed, 1 half open, 2 open)',
+    multiprocess_mode='liveall'
+)
+AI_NUTRITION_CACHE_LOOKUPS = Counter(
+    'gicalc_ai_nutrition_cache_lookups_total',
+    'ai_nutrition_cache lookups: hit, stale (served while refreshing), expired, persistent_hit or miss (OpenAI call)',
+    ['result']
+)
+DAILY_LIMIT_REJECTIONS = Counter('gicalc_daily_limit_rejections_total', 'Requests rejected by the daily meal limit')
+CATALOG_RELOADS = Counter('gicalc_catalog_reloads_total', 'Food catalog loads that published a new version, or failed', ['result'])
+CACHE_ENTRIES = Gauge('gicalc_cache_entries', 'Entries held by each in-process cache', ['cache'], multiprocess_mode='liveall')
+RATE_LIMITER_KEYS = Gauge(
+    'gicalc_rate_limiter_keys', 'Sliding-window counters tracked by the rate limiter',
+    ['backend'],
+    # Database counters are shared, so every worker reports the same number
+    multiprocess_mode='livemax' if RATE_LIMIT_BACKEND == 'database' else 'liveall'
+)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_db_query(conn, cursor, statement, parameters, context, executemany):
+    """Count SQL statements issued on the request thread"""
+    if has_request_context():
+        g.db_queries = g.get('db_queries', 0) + 1
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.db_queries = 0
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe latency and query count (streamed responses are timed to the first byte)"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+        REQUESTS_TOTAL.labels(endpoint, request.method, str(response.status_code)).inc()
+        DB_QUERIES_PER_REQUEST.labels(endpoint).observe(g.get('db_queries', 0))
+    return response
+
+
+def update_metric_gauges(include_rate_limiter=True):
+    """Refresh this worker's cache and rate limiter size gauges.
+    
+    Scrapes pass include_rate_limiter=False: with the database backend that size is a
+    COUNT over the whole counters table, so only the sweeper refreshes it.
+    """
+    CACHE_ENTRIES.labels('ai_nutrition').set(len(ai_nutrition_cache))
+    CACHE_ENTRIES.labels('parse_result').set(len(parse_result_cache))
+    CACHE_ENTRIES.labels('suggestions').set(len(suggestions_cache))
+    CACHE_ENTRIES.labels('auth_user').set(len(auth_user_cache))
+    AI_CIRCUIT_STATE.set({'closed': 0, 'half_open': 1, 'open': 2}[ai_circuit_breaker.state])
+    if include_rate_limiter:
+        with app.app_context():
+            RATE_LIMITER_KEYS.labels(RATE_LIMIT_BACKEND).set(rate_limiter.size())
+
+
+def render_metrics():
+    """Prometheus text exposition, summed over every gunicorn worker when multiprocess mode is on"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+# ============================================
+# AI GATEWAY
+# ============================================
+
+class AIUnavailable(Exception):
+    """Raised by the AI gateway when a call can't be made or keeps failing"""
+
+
+RETRYABLE_AI_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)  # APIConnectionError covers timeouts
+
+
+class CircuitBreaker:
+    """Trips open when recent calls fail or run slow too often; after a cool-down one probe call decides whether to close"""
+    
+    def __init__(self, window_seconds, min_calls, failure_rate, slow_call_seconds, slow_call_rate, open_seconds, clock=time.monotonic):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = 'closed'  # 'closed', 'open' or 'half_open'
+        self.opened_until = 0.0
+        self.opens = 0
+        self._calls = deque()  # [(timestamp, failed, slow)]
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        """Whether a call may go upstream now (in half-open state, only the single probe call)"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open':
+                if self.clock() < self.opened_until:
+                    return False
+                self.state = 'half_open'
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+    
+    def is_open(self):
+        """Whether calls are being refused: open within the cool-down, or half-open with the probe still out"""
+        with self._lock:
+            if self.state == 'open' and self.clock() < self.opened_until:
+                return True
+            return self.state != 'closed' and self._probe_in_flight
+    
+    def record(self, failed, duration_seconds):
+        """Record a finished call; returns True if this call tripped the breaker open"""
+        now = self.clock()
+        slow = duration_seconds >= self.slow_call_seconds
+        
+        with self._lock:
+            if self.state == 'half_open':
+                self._probe_in_flight = False
+                if failed or slow:
+                    return self._trip(now)
+                self.state = 'closed'
+                self._calls.clear()
+                return False
+            
+            self._calls.append((now, failed, slow))
+            while self._calls and self._calls[0][0] <= now - self.window_seconds:
+                self._calls.popleft()
+            
+            if self.state != 'closed' or len(self._calls) < self.min_calls:
+                return False
+            failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+            slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+            if failures >= self.failure_rate * len(self._calls) or slow_calls >= self.slow_call_rate * len(self._calls):
+                return self._trip(now)
+            return False
+    
+    def _trip(self, now):
+        self.state = 'open'
+        self.opened_until = now + self.open_seconds
+        self.opens += 1
+        self._calls.clear()
+        return True
+    
+    def snapshot(self):
+        with self._lock:
+            calls = len(self._calls)
+            return {
+                'state': self.state,
+                'open_for_seconds': round(max(self.opened_until - self.clock(), 0), 1) if self.state == 'open' else 0,
+                'recent_calls': calls,
+                'recent_failure_rate': round(sum(1 for _, failed, _ in self._calls if failed) / calls, 2) if calls else 0,
+                'recent_slow_rate': round(sum(1 for _, _, slow in self._calls if slow) / calls, 2) if calls else 0,
+                'opens': self.opens
+            }
+
+
+ai_circuit_breaker = CircuitBreaker(
+    AI_BREAKER_WINDOW_SECONDS, AI_BREAKER_MIN_CALLS, AI_BREAKER_FAILURE_RATE,
+    AI_BREAKER_SLOW_CALL_SECONDS, AI_BREAKER_SLOW_CALL_RATE, AI_BREAKER_OPEN_SECONDS
+)
+
+
+def ai_degraded():
+    """True while the breaker refuses calls (open, or probing): AI-backed endpoints should answer from the database and caches only"""
+    return ai_circuit_breaker.is_open()
+
+
+def record_ai_call(call_site, failed, duration_seconds):
+    OPENAI_LATENCY.labels(call_site, 'error' if failed else 'success').observe(duration_seconds)
+    if ai_circuit_breaker.record(failed, duration_seconds):
+        AI_CIRCUIT_OPENS.inc()
+        app.logger.warning(f"AI circuit breaker opened after a {call_site} call; database-only mode for {AI_BREAKER_OPEN_SECONDS}s")
+
+
+def create_chat_completion(call_site, **kwargs):
+    """Call OpenAI chat completions within the call site's deadline, retrying transient errors with jitter.
+    
+    Raises AIUnavailable when there is no client, the breaker is open, or the call keeps failing.
+    """
+    if not openai_client:
+        raise AIUnavailable('OpenAI API key not configured')
+    if not ai_circuit_breaker.allow():
+        OPENAI_SHORT_CIRCUITS.labels(call_site).inc()
+        raise AIUnavailable('AI circuit breaker is open')
+    
+    deadline = time.monotonic() + AI_CALL_DEADLINES_SECONDS[call_site]
+    attempt = 1
+    while True:
+        remaining = deadline - time.monotonic()
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = openai_client.chat.completions.create(
+                timeout=Timeout(remaining, connect=min(AI_CONNECT_TIMEOUT_SECONDS, remaining)),
+                **kwargs
+            )
+            failed = False
+        except RETRYABLE_AI_ERRORS as e:
+            retryable_error = e
+        except Exception as e:
+            raise AIUnavailable(f"{call_site} call failed: {e}") from e
+        finally:
+            # Also runs on GreenletExit / gevent.Timeout, so a half-open probe can't stay in flight forever
+            record_ai_call(call_site, failed, time.perf_counter() - started)
+        
+        if not failed:
+            usage = getattr(response, 'usage', None)
+            if usage:
+                OPENAI_TOKENS.labels(call_site, 'prompt').inc(usage.prompt_tokens or 0)
+                OPENAI_TOKENS.labels(call_site, 'completion').inc(usage.completion_tokens or 0)
+            return response
+        
+        backoff = random.uniform(0, AI_RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+        if attempt >= AI_MAX_ATTEMPTS or time.monotonic() + backoff >= deadline or not ai_circuit_breaker.allow():
+            raise AIUnavailable(f"{call_site} call failed after {attempt} attempt(s): {retryable_error}") from retryable_error
+        OPENAI_RETRIES.labels(call_site).inc()
+        app.logger.info(f"Retrying {call_site} call in {backoff:.2f}s after: {retryable_error}")
+        time.sleep(backoff)
+        attempt += 1
+
+
+def request_ai_json(call_site, system_prompt, user_prompt, max_tokens, temperature=0.3):
+    """Ask GPT for a JSON object through the gateway; returns the dict, or None (logged) if the call or reply is unusable"""
+    try:
+        response = create_chat_completion(
+            call_site,
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+    except AIUnavailable as e:
+        app.logger.error(f"AI {call_site} call unavailable: {e}")
+        return None
+    
+    content = response.choices[0].message.content
+    if not content:
+        app.logger.error(f"Empty AI {call_site} response")
+        return None
+    
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        app.logger.error(f"Failed to parse AI {call_site} JSON response: {content}")
+        return None
+    
+    if not isinstance(data, dict):
+        app.logger.error(f"Unexpected AI {call_site} response format: {data}")
+        return None
+    return data
+
+
+# ============================================
+# PASSWORD HASHING
+# ============================================
+
+class PasswordHashingBusy(Exception):
+    """Raised when every password hashing slot is taken (login/registration storm)"""
+
+
+def get_password_hash_executor():
+    """Process pool for password KDF work, created lazily so each gunicorn worker forks its own"""
+    global password_hash_executor
+    
+    with password_hash_executor_lock:
+        if password_hash_executor is None:
+            password_hash_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        return password_hash_executor
+
+
+def run_password_job(fn, *args, **kwargs):
+    """Run a hashing function in the process pool, capped at PASSWORD_HASH_MAX_PENDING concurrent jobs"""
+    if not password_hash_slots.acquire(timeout=PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS):
+        raise PasswordHashingBusy()
+    
+    try:
+        return get_password_hash_executor().submit(fn, *args, **kwargs).result()
+    finally:
+        password_hash_slots.release()
+
+
+def hash_password(password):
+    """Hash a password with PASSWORD_HASH_METHOD in the process pool"""
+    return run_password_job(generate_password_hash, password, method=PASSWORD_HASH_METHOD)
+
+
+def verify_password(password_hash, password):
+    """Check a password against its stored hash in the process pool"""
+    return run_password_job(check_password_hash, password_hash, password)
+
+
+def get_password_hash_prefix():
+    """The "method:params" prefix of a PASSWORD_HASH_METHOD hash, with werkzeug's defaults filled in.
+    
+    Short forms such as "scrypt" or "pbkdf2:sha256" are stored expanded ("scrypt:32768:8:1"),
+    so stored hashes are compared with a sample hash made once per worker, not with the setting.
+    """
+    global password_hash_prefix
+    
+    if password_hash_prefix is None:
+        password_hash_prefix = hash_password('').split('$', 1)[0]
+    return password_hash_prefix
+
+
+def password_busy_response():
+    return jsonify({
+        'error': 'Server busy',
+        'message': 'Too many sign-in requests right now. Please try again in a moment.'
+    }), 503
+
+
 # ============================================
 # AUTHENTICATION HELPERS
 # ============================================
@@ -164,49 +1044,136 @@ def decode_token(token):
     """Decode and validate JWT token"""
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
-        return payload['user_id']
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    
+    # Other signed tokens (or forged claims) without an integer user_id are invalid, not a server error
+    user_id = payload.get('user_id')
+    if not isinstance(user_id, int) or isinstance(user_id, bool):
+        return None
+    return user_id
+
+
+def generate_nutrition_token(food_option):
+    """Sign an AI-estimated food option so /calculate-gl can trust it without another AI call"""
+    payload = {
+        'purpose': 'nutrition',
+        'aud': NUTRITION_TOKEN_AUDIENCE,
+        'name': str(food_option['name']).lower().strip(),
+        'gi': food_option['gi'],
+        'carbs_per_unit': food_option['carbs_per_unit'],
+        'fiber_per_unit': food_option['fiber_per_unit'],
+        'exp': datetime.utcnow() + timedelta(hours=NUTRITION_TOKEN_EXPIRY_HOURS)
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm='HS256')
+
+
+def decode_nutrition_token(token, food_name):
+    """Return signed nutrition data for food_name, or None if the token is missing, invalid or for another food"""
+    if not token or not isinstance(token, str):
+        return None
+    
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'], audience=NUTRITION_TOKEN_AUDIENCE)
+    except jwt.InvalidTokenError:
+        return None
+    
+    if payload.get('purpose') != 'nutrition' or payload.get('name') != food_name.lower().strip():
+        return None
+    
+    try:
+        return {
+            'gi': float(payload['gi']),
+            'carbs_per_unit': float(payload['carbs_per_unit']),
+            'fiber_per_unit': float(payload['fiber_per_unit'])
+        }
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+class AuthenticatedUser:
+    """Detached snapshot of a User row, safe to keep in auth_user_cache across requests"""
+    __slots__ = ('id', 'email', 'created_at')
+    
+    def __init__(self, user):
+        self.id = user.id
+        self.email = user.email
+        self.created_at = user.created_at
+    
+    to_dict = User.to_dict
+
+
+def auth_error(error, message):
+    return jsonify({'error': error, 'message': message}), 401
+
+
+def load_user_with_usage(user_id):
+    """Fetch a user and today's usage count in one query; returns (user, usage_count) or (None, 0)"""
+    usage_date = datetime.utcnow().date()
+    row = db.session.query(User, DailyUsageCounter.count).outerjoin(
+        DailyUsageCounter,
+        (DailyUsageCounter.user_id == User.id) & (DailyUsageCounter.usage_date == usage_date)
+    ).filter(User.id == user_id).first()
+    
+    if not row:
+        return None, 0
+    if row[1] is None:
+        # No counter yet today: meals logged before it existed still count
+        return row[0], count_logged_meals(user_id, usage_date)
+    return row[0], row[1]
+
+
+def authenticate_request(load_usage=False):
+    """Resolve the Bearer token to (user, usage_count, error_response); usage_count is None unless load_usage"""
+    auth_header = request.headers.get('Authorization')
+    
+    if not auth_header:
+        return None, None, auth_error('Authorization required', 'Please provide an Authorization header with Bearer token')
+    
+    # Extract token from "Bearer <token>" format
+    parts = auth_header.split()
+    if len(parts) != 2 or parts[0].lower() != 'bearer':
+        return None, None, auth_error('Invalid authorization format', 'Authorization header must be: Bearer <token>')
+    
+    user_id = decode_token(parts[1])
+    if not user_id:
+        return None, None, auth_error('Invalid or expired token', 'Please login again to get a new token')
+    
+    user_not_found = auth_error('User not found', 'The user associated with this token no longer exists')
+    if auth_missing_user_cache.get(user_id):
+        return None, None, user_not_found
+    
+    usage_count = None
+    user = auth_user_cache.get(user_id)
+    if user is None:
+        if load_usage:
+            db_user, usage_count = load_user_with_usage(user_id)
+        else:
+            db_user = db.session.get(User, user_id)
+        
+        if not db_user:
+            auth_missing_user_cache.set(user_id, True)
+            return None, None, user_not_found
+        
+        user = AuthenticatedUser(db_user)
+        auth_user_cache.set(user_id, user)
+        release_db_connection()
+    elif load_usage:
+        usage_count = get_daily_usage_count(user_id)
+        release_db_connection()
+    
+    return user, usage_count, None
 
 
 def require_auth(f):
     """Decorator to require authentication for endpoints"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        
-        if not auth_header:
-            return jsonify({
-                'error': 'Authorization required',
-                'message': 'Please provide an Authorization header with Bearer token'
-            }), 401
-        
-        # Extract token from "Bearer <token>" format
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0].lower() != 'bearer':
-            return jsonify({
-                'error': 'Invalid authorization format',
-                'message': 'Authorization header must be: Bearer <token>'
-            }), 401
-        
-        token = parts[1]
-        user_id = decode_token(token)
-        
-        if not user_id:
-            return jsonify({
-                'error': 'Invalid or expired token',
-                'message': 'Please login again to get a new token'
-            }), 401
-        
-        # Get user from database
-        user = db.session.get(User, user_id)
-        if not user:
-            return jsonify({
-                'error': 'User not found',
-                'message': 'The user associated with this token no longer exists'
-            }), 401
+        user, _, error_response = authenticate_request()
+        if error_response:
+            return error_response
         
         # Add user to request context
         request.current_user = user
@@ -217,26 +1184,77 @@ def require_auth(f):
 
 def get_daily_usage_count(user_id):
     """Get user's daily usage count (read-only, no increment)"""
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    usage_date = datetime.utcnow().date()
+    counter = db.session.get(DailyUsageCounter, (user_id, usage_date))
+    # Without a counter row (no counted meal yet today), fall back to the meal_usages log
+    return counter.count if counter else count_logged_meals(user_id, usage_date)
+
+
+def count_logged_meals(user_id, usage_date):
+    """Meals in the meal_usages log for a UTC day (seeds a counter created after meals were logged)"""
+    day_start = datetime.combine(usage_date, datetime.min.time())
     return MealUsage.query.filter(
         MealUsage.user_id == user_id,
-        MealUsage.created_at >= today_start
+        MealUsage.created_at >= day_start,
+        MealUsage.created_at < day_start + timedelta(days=1)
     ).count()
 
 
+def increment_daily_usage(user_id, usage_date):
+    """Add one to today's counter unless it is at DAILY_MEAL_LIMIT; returns the new count or None.
+    
+    A counter created mid-day (e.g. the day counters were deployed) starts from the meals
+    meal_usages already has for that day, so nobody gets a fresh allowance.
+    """
+    dialect = db.session.get_bind().dialect.name
+    
+    if dialect in ('postgresql', 'sqlite'):
+        # Check and increment in one statement: concurrent requests can't both take the last meal
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        table = DailyUsageCounter.__table__
+        statement = insert(table).values(user_id=user_id, usage_date=usage_date, count=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.usage_date],
+            set_={'count': table.c.count + 1},
+            where=table.c.count < DAILY_MEAL_LIMIT
+        ).returning(table.c.count)
+        new_count = db.session.execute(statement).scalar()
+        
+        if new_count == 1:
+            # Only a freshly inserted row comes back as 1; concurrent requests wait on its row lock
+            logged_count = count_logged_meals(user_id, usage_date)
+            if logged_count:
+                new_count = logged_count + 1 if logged_count < DAILY_MEAL_LIMIT else None
+                DailyUsageCounter.query.filter_by(user_id=user_id, usage_date=usage_date).update({'count': new_count or logged_count})
+        return new_count
+    
+    counter = db.session.get(DailyUsageCounter, (user_id, usage_date), with_for_update=True)
+    if not counter:
+        counter = DailyUsageCounter(user_id=user_id, usage_date=usage_date, count=count_logged_meals(user_id, usage_date))
+        db.session.add(counter)
+    if counter.count >= DAILY_MEAL_LIMIT:
+        return None
+    counter.count += 1
+    db.session.flush()
+    return counter.count
+
+
 def check_daily_limit(user_id, endpoint):
     """Check if user has exceeded daily meal limit and log usage if allowed"""
-    today_count = get_daily_usage_count(user_id)
+    new_count = increment_daily_usage(user_id, datetime.utcnow().date())
     
-    if today_count >= DAILY_MEAL_LIMIT:
-        return False, today_count
+    if new_count is None:
+        # Keeps a counter that was just seeded from meal_usages; otherwise nothing changed
+        db.session.commit()
+        DAILY_LIMIT_REJECTIONS.inc()
+        return False, get_daily_usage_count(user_id)
     
-    # Log this usage
+    # Log this usage (same commit as the counter increment)
     usage = MealUsage(user_id=user_id, endpoint=endpoint)
     db.session.add(usage)
     db.session.commit()
     
-    return True, today_count + 1
+    return True, new_count
 
 
 def is_disposable_email(email):
@@ -250,111 +1268,40 @@ def is_disposable_email(email):
 
 def check_ip_registration_limit(ip_address):
     """Check if IP has exceeded daily registration limit"""
-    global ip_registration_tracker
-    
-    now = datetime.utcnow()
-    one_day_ago = now - timedelta(days=1)
-    
-    if ip_address not in ip_registration_tracker:
-        ip_registration_tracker[ip_address] = []
-    
-    # Clean up old timestamps
-    ip_registration_tracker[ip_address] = [
-        ts for ts in ip_registration_tracker[ip_address]
-        if ts > one_day_ago
-    ]
-    
-    # Check if limit exceeded
-    if len(ip_registration_tracker[ip_address]) >= IP_REGISTRATIONS_PER_DAY:
-        return False, len(ip_registration_tracker[ip_address])
-    
-    return True, len(ip_registration_tracker[ip_address])
+    return rate_limiter.apply(f'register-ip:{ip_address}', IP_REGISTRATIONS_PER_DAY, 86400, increment=False)
 
 
 def record_ip_registration(ip_address):
     """Record a successful registration for an IP"""
-    global ip_registration_tracker
-    
-    if ip_address not in ip_registration_tracker:
-        ip_registration_tracker[ip_address] = []
-    
-    ip_registration_tracker[ip_address].append(datetime.utcnow())
+    rate_limiter.apply(f'register-ip:{ip_address}', None, 86400, increment=True)
 
 
 def check_per_minute_limit(user_id):
-    """Check if user has exceeded per-minute rate limit (in-memory)"""
-    global request_timestamps
-    
-    now = datetime.utcnow()
-    one_minute_ago = now - timedelta(minutes=1)
-    
-    # Get user's recent request timestamps
-    if user_id not in request_timestamps:
-        request_timestamps[user_id] = []
-    
-    # Clean up old timestamps (older than 1 minute)
-    request_timestamps[user_id] = [
-        ts for ts in request_timestamps[user_id] 
-        if ts > one_minute_ago
-    ]
-    
-    # Check if user has exceeded limit
-    if len(request_timestamps[user_id]) >= REQUESTS_PER_MINUTE:
-        return False, len(request_timestamps[user_id])
-    
-    # Record this request
-    request_timestamps[user_id].append(now)
-    
-    return True, len(request_timestamps[user_id])
+    """Check if user has exceeded per-minute rate limit and count this request if not"""
+    return rate_limiter.apply(f'minute:{user_id}', REQUESTS_PER_MINUTE, 60, increment=True)
+
+
+def minute_limit_response(minute_count):
+    return jsonify({
+        'error': 'Rate limit exceeded',
+        'message': f'Too many requests. Maximum {REQUESTS_PER_MINUTE} requests per minute. Please wait a moment.',
+        'requests_per_minute': REQUESTS_PER_MINUTE,
+        'current_count': minute_count
+    }), 429
 
 
 def require_auth_with_minute_limit(f):
     """Decorator that requires auth AND enforces per-minute limit only (no daily counting)"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        
-        if not auth_header:
-            return jsonify({
-                'error': 'Authorization required',
-                'message': 'Please provide an Authorization header with Bearer token'
-            }), 401
-        
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0].lower() != 'bearer':
-            return jsonify({
-                'error': 'Invalid authorization format',
-                'message': 'Authorization header must be: Bearer <token>'
-            }), 401
-        
-        token = parts[1]
-        user_id = decode_token(token)
+        # Usage count (read-only) comes back with the user so endpoints can display remaining meals
+        user, usage_count, error_response = authenticate_request(load_usage=True)
+        if error_response:
+            return error_response
         
-        if not user_id:
-            return jsonify({
-                'error': 'Invalid or expired token',
-                'message': 'Please login again to get a new token'
-            }), 401
-        
-        user = db.session.get(User, user_id)
-        if not user:
-            return jsonify({
-                'error': 'User not found',
-                'message': 'The user associated with this token no longer exists'
-            }), 401
-        
-        # Check per-minute rate limit only (prevents burst abuse)
-        minute_allowed, minute_count = check_per_minute_limit(user_id)
+        minute_allowed, minute_count = check_per_minute_limit(user.id)
         if not minute_allowed:
-            return jsonify({
-                'error': 'Rate limit exceeded',
-                'message': f'Too many requests. Maximum {REQUESTS_PER_MINUTE} requests per minute. Please wait a moment.',
-                'requests_per_minute': REQUESTS_PER_MINUTE,
-                'current_count': minute_count
-            }), 429
-        
-        # Fetch usage count (read-only) so endpoints can display remaining meals
-        usage_count = get_daily_usage_count(user_id)
+            return minute_limit_response(minute_count)
         
         request.current_user = user
         request.usage_count = usage_count
@@ -367,49 +1314,17 @@ def require_auth_with_limit(f):
     """Decorator that requires auth AND enforces daily meal limit + per-minute limit"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        
-        if not auth_header:
-            return jsonify({
-                'error': 'Authorization required',
-                'message': 'Please provide an Authorization header with Bearer token'
-            }), 401
-        
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0].lower() != 'bearer':
-            return jsonify({
-                'error': 'Invalid authorization format',
-                'message': 'Authorization header must be: Bearer <token>'
-            }), 401
-        
-        token = parts[1]
-        user_id = decode_token(token)
-        
-        if not user_id:
-            return jsonify({
-                'error': 'Invalid or expired token',
-                'message': 'Please login again to get a new token'
-            }), 401
-        
-        user = db.session.get(User, user_id)
-        if not user:
-            return jsonify({
-                'error': 'User not found',
-                'message': 'The user associated with this token no longer exists'
-            }), 401
+        user, _, error_response = authenticate_request()
+        if error_response:
+            return error_response
         
         # Check per-minute rate limit first (prevents burst abuse)
-        minute_allowed, minute_count = check_per_minute_limit(user_id)
+        minute_allowed, minute_count = check_per_minute_limit(user.id)
         if not minute_allowed:
-            return jsonify({
-                'error': 'Rate limit exceeded',
-                'message': f'Too many requests. Maximum {REQUESTS_PER_MINUTE} requests per minute. Please wait a moment.',
-                'requests_per_minute': REQUESTS_PER_MINUTE,
-                'current_count': minute_count
-            }), 429
+            return minute_limit_response(minute_count)
         
         # Check daily limit
-        allowed, count = check_daily_limit(user_id, request.endpoint)
+        allowed, count = check_daily_limit(user.id, request.endpoint)
         if not allowed:
             return jsonify({
                 'error': 'Daily limit reached',
@@ -424,7 +1339,6 @@ def require_auth_with_limit(f):
     
     return decorated
 
-
 # ============================================
 # AUTH ENDPOINTS
 # ============================================
@@ -538,6 +1452,9 @@ def register():
         db.session.add(user)
         db.session.commit()
         
+        # A recycled user id must not stay rejected by the negative auth cache
+        auth_missing_user_cache.delete(user.id)
+        
         # Record successful registration for IP tracking
         record_ip_registration(client_ip)
         
@@ -553,6 +1470,10 @@ def register():
             'token': token
         }), 201
         
+    except PasswordHashingBusy:
+        app.logger.warning("Password hashing pool saturated; rejecting registration")
+        db.session.rollback()
+        return password_busy_response()
     except Exception as e:
         app.logger.error(f"Error in register: {e}")
         db.session.rollback()
@@ -592,15 +1513,17 @@ def login():
                 'message': 'Email or password is incorrect'
             }), 401
         
+        # Upgrade hashes made with an older method or cost now that we have the plaintext
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+            app.logger.info(f"Upgraded password hash for user {user.id} to {PASSWORD_HASH_METHOD}")
+        
         # Generate token
         token = generate_token(user.id)
         
         # Get today's usage count
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = MealUsage.query.filter(
-            MealUsage.user_id == user.id,
-            MealUsage.created_at >= today_start
-        ).count()
+        today_count = get_daily_usage_count(user.id)
         
         return jsonify({
             'status': 'success',
@@ -614,6 +1537,10 @@ def login():
             }
         })
         
+    except PasswordHashingBusy:
+        app.logger.warning("Password hashing pool saturated; rejecting login")
+        db.session.rollback()
+        return password_busy_response()
     except Exception as e:
         app.logger.error(f"Error in login: {e}")
         return jsonify({
@@ -630,11 +1557,7 @@ def get_current_user():
         user = request.current_user
         
         # Get today's usage count
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = MealUsage.query.filter(
-            MealUsage.user_id == user.id,
-            MealUsage.created_at >= today_start
-        ).count()
+        today_count = get_daily_usage_count(user.id)
         
         return jsonify({
             'user': user.to_dict(),
@@ -653,66 +1576,461 @@ def get_current_user():
         }), 500
 
 
-# ============================================
-# FOOD DATABASE HELPERS
-# ============================================
+# ============================================
+# FOOD DATABASE HELPERS
+# ============================================
+
+def build_food_indexes(foods):
+    """Build the lowercase name list, word index and trigram index used by the food matchers"""
+    names_lower = []
+    token_index = {}
+    trigram_index = {}
+    
+    for position, food_item in enumerate(foods):
+        name_lower = food_item['name'].lower()
+        names_lower.append(name_lower)
+        
+        for word in set(name_lower.split()):
+            token_index.setdefault(word, []).append(position)
+        
+        for start in range(len(name_lower) - 2):
+            trigram_index.setdefault(name_lower[start:start + 3], set()).add(position)
+    
+    return names_lower, token_index, trigram_index
+
+
+def normalize_food_name(food_name):
+    """Lowercase, drop punctuation and collapse whitespace ("Poori's" -> "pooris")"""
+    food_name = re.sub(r"[^a-z0-9\s]", "", food_name.lower().replace("-", " "))
+    return " ".join(food_name.split())
+
+
+def food_name_trigrams(text):
+    """Padded character trigrams, so word starts and ends carry weight"""
+    padded = f"  {text} "
+    return {padded[start:start + 3] for start in range(len(padded) - 2)}
+
+
+def build_fuzzy_index(foods):
+    """Build fuzzy match keys (full name and name without parentheticals) and their trigram index"""
+    fuzzy_keys = []
+    fuzzy_trigram_index = {}
+    
+    for position, food_item in enumerate(foods):
+        keys = {
+            normalize_food_name(food_item['name']),
+            normalize_food_name(re.sub(r"\(.*?\)", " ", food_item['name']))
+        }
+        for key in keys:
+            if not key:
+                continue
+            trigrams = food_name_trigrams(key)
+            key_id = len(fuzzy_keys)
+            fuzzy_keys.append((key, position, len(trigrams)))
+            for trigram in trigrams:
+                fuzzy_trigram_index.setdefault(trigram, []).append(key_id)
+    
+    return fuzzy_keys, fuzzy_trigram_index
+
+
+class FoodRecord:
+    """Catalog food compiled once at load time with its derived values precomputed"""
+    __slots__ = (
+        'name', 'category', 'gi', 'unit', 'unit_desc', 'carbs_per_unit', 'fiber_per_unit',
+        'net_carbs', 'gl_per_unit', 'grams_per_unit', 'match_payload'
+    )
+    
+    def __init__(self, food_item):
+        self.name = food_item['name']
+        self.category = food_item['category']
+        self.gi = food_item['gi']
+        self.unit = food_item['unit']
+        self.unit_desc = food_item['unit_desc']
+        self.carbs_per_unit = food_item['carbs_per_unit']
+        self.fiber_per_unit = food_item['fiber_per_unit']
+        self.net_carbs = float(self.carbs_per_unit) - float(self.fiber_per_unit)
+        self.gl_per_unit = float(self.gi) * self.net_carbs / 100
+        self.grams_per_unit = extract_grams_from_unit_desc(self.unit_desc)
+        # Ready-made /parse-meal-smart option; shared, so callers must not mutate it
+        self.match_payload = {
+            'name': self.name,
+            'category': self.category,
+            'gi': self.gi,
+            'unit': self.unit,
+            'unit_desc': self.unit_desc,
+            'grams_per_unit': self.grams_per_unit,
+            'carbs_per_unit': self.carbs_per_unit,
+            'fiber_per_unit': self.fiber_per_unit,
+            'source': 'database'
+        }
+    
+    def __getitem__(self, key):
+        """Dict-style access so records work wherever a raw food dict did"""
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+
+def build_catalog_columns(records):
+    """Column-oriented NumPy view of the catalog for vectorized GL scoring"""
+    return {
+        'gi': np.array([float(record.gi) for record in records], dtype=np.float64),
+        'net_carbs': np.array([record.net_carbs for record in records], dtype=np.float64),
+        'grams_per_unit': np.array([record.grams_per_unit for record in records], dtype=np.float64)
+    }
+
+
+class FoodCatalog:
+    """Immutable snapshot of the food catalog and every index built from it.
+    
+    load_food_database builds a new snapshot off to the side and publishes it by
+    rebinding food_catalog, so a request that reads food_catalog once sees a single
+    consistent version even while a reload is happening.
+    """
+    __slots__ = (
+        'foods', 'records', 'lookup', 'version', 'loaded_at',
+        'names_lower', 'token_index', 'trigram_index', 'token_max_length', 'position_lookup',
+        'columns', 'fuzzy_keys', 'fuzzy_trigram_index'
+    )
+    
+    def __init__(self, foods, version=''):
+        self.foods = foods
+        self.version = version  # Content hash of the catalog file; keys shared caches
+        self.loaded_at = datetime.utcnow()
+        
+        self.records = [FoodRecord(food_item) for food_item in foods]  # Parallel to foods
+        self.lookup = {record.name.lower(): record for record in self.records}  # {name_lower: FoodRecord}
+        
+        # Matching indexes (positions refer to foods)
+        self.names_lower, self.token_index, self.trigram_index = build_food_indexes(foods)
+        self.token_max_length = max((len(word) for word in self.token_index), default=0)
+        self.position_lookup = {name: position for position, name in enumerate(self.names_lower)}
+        self.columns = build_catalog_columns(self.records)  # {'gi', 'net_carbs', 'grams_per_unit'}: numpy arrays by position
+        self.fuzzy_keys, self.fuzzy_trigram_index = build_fuzzy_index(foods)
+
+
+class CatalogLoadError(Exception):
+    """Raised when the catalog file is missing or invalid; the current catalog stays published"""
+
+
+def catalog_file_signature(path):
+    """(mtime_ns, size) of the catalog file, or None if it can't be read"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_food_database(force=False):
+    """Load the food catalog file and publish it as a new FoodCatalog with one reference swap.
+    
+    Skips the read when the file is unchanged (unless force). Returns True if a new
+    version was published, False if the file holds the current version. A file that is
+    missing or invalid keeps the current catalog and raises CatalogLoadError.
+    """
+    global food_catalog, catalog_source_signature, catalog_failed_signature
+    
+    with catalog_reload_lock:
+        current = food_catalog
+        signature = catalog_file_signature(FOOD_CATALOG_PATH)
+        if current is not None and not force and signature in (catalog_source_signature, catalog_failed_signature):
+            return False
+        
+        new_catalog = None
+        error = None
+        try:
+            with open(FOOD_CATALOG_PATH, 'rb') as file:
+                catalog_bytes = file.read()
+            foods = json.loads(catalog_bytes.decode('utf-8'))
+            if not isinstance(foods, list):
+                raise ValueError('catalog must be a JSON array of foods')
+            version = hashlib.sha256(catalog_bytes).hexdigest()[:16]
+            
+            if current is not None and version == current.version:
+                # Touched but identical: nothing to rebuild or invalidate
+                catalog_source_signature = signature
+                catalog_failed_signature = None
+                return False
+            
+            # Everything is built before the swap; FoodRecord raises on foods with missing fields
+            new_catalog = FoodCatalog(foods, version)
+            
+        except FileNotFoundError:
+            error = f"Food database file not found: {FOOD_CATALOG_PATH}"
+        except json.JSONDecodeError as e:
+            error = f"Error parsing JSON file: {e}"
+        except Exception as e:
+            error = f"Unexpected error loading food database: {e!r}"
+        
+        if new_catalog is None:
+            app.logger.error(error)
+            CATALOG_RELOADS.labels('failed').inc()
+            catalog_failed_signature = signature
+            if current is None:
+                food_catalog = FoodCatalog([])
+            raise CatalogLoadError(error)
+        
+        food_catalog = new_catalog
+        catalog_source_signature = signature
+        catalog_failed_signature = None
+    
+    CATALOG_RELOADS.labels('published').inc()
+    app.logger.info(f"Successfully loaded {len(new_catalog.foods)} food items from database (version {new_catalog.version})")
+    
+    if current is not None:
+        invalidate_catalog_caches()
+    # Also runs on the first load, so each worker start clears expired and superseded rows
+    purge_parse_result_cache(new_catalog.version)
+    return True
+
+
+def invalidate_catalog_caches():
+    """Drop in-process results computed against the previous catalog"""
+    # Shared parse cache rows are keyed by catalog version, so they stop matching (and are purged after the publish)
+    parse_result_cache.clear()
+    # GL buckets (and so suggestions) move when catalog GI/carb values change
+    suggestions_cache.clear()
+
+
+def read_catalog_state():
+    """The shared reload signal as (generation, version); (0, '') before the first admin reload"""
+    with app.app_context():
+        state = db.session.get(CatalogState, 1)
+        result = (state.generation, state.version) if state else (0, '')
+        db.session.commit()
+        return result
+
+
+def publish_catalog_reload(version):
+    """Bump the shared reload generation so every other worker reloads on its next check"""
+    updated = CatalogState.query.filter_by(id=1).update({
+        CatalogState.generation: CatalogState.generation + 1,
+        CatalogState.version: version,
+        CatalogState.updated_at: datetime.utcnow()
+    })
+    if not updated:
+        db.session.add(CatalogState(id=1, generation=1, version=version))
+    db.session.commit()
+    return read_catalog_state()[0]
+
+
+def run_catalog_watcher():
+    """Reload the catalog when its file changes, or when another worker published a reload"""
+    seen_generation = None
+    while True:
+        try:
+            generation, _ = read_catalog_state()
+            force = seen_generation is not None and generation != seen_generation
+            seen_generation = generation
+            load_food_database(force=force)
+        except CatalogLoadError:
+            pass  # Already logged; the current catalog stays published
+        except Exception as e:
+            app.logger.error(f"Catalog reload check failed: {e}")
+        time.sleep(CATALOG_RELOAD_CHECK_SECONDS)
+
+
+def start_catalog_watcher():
+    """Start the catalog watcher thread for this worker process (unless CATALOG_RELOAD_CHECK_SECONDS is 0)"""
+    if CATALOG_RELOAD_CHECK_SECONDS <= 0:
+        return
+    watcher = threading.Thread(target=run_catalog_watcher, name='catalog-watcher', daemon=True)
+    watcher.start()
+
+
+def warm_ai_nutrition_cache():
+    """Bulk-load unexpired persistent cache entries into ai_nutrition_cache (run at startup)"""
+    cutoff = datetime.utcnow() - timedelta(hours=AI_CACHE_EXPIRY_HOURS)
+    
+    try:
+        # Drop expired rows so the table doesn't grow without bound
+        AINutritionCacheEntry.query.filter(AINutritionCacheEntry.cached_at < cutoff).delete()
+        db.session.commit()
+        
+        loaded = 0
+        for entry in AINutritionCacheEntry.query.all():
+            try:
+                ai_nutrition_cache[entry.food_name] = {
+                    'data': json.loads(entry.data),
+                    'cached_at': entry.cached_at
+                }
+                loaded += 1
+            except json.JSONDecodeError:
+                app.logger.error(f"Skipping corrupt persistent cache entry for '{entry.food_name}'")
+        
+        app.logger.info(f"Warmed AI nutrition cache with {loaded} persisted entries")
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error warming AI nutrition cache: {e}")
+
+
+def load_persisted_ai_nutrition(food_name_lower, max_age_hours=AI_CACHE_EXPIRY_HOURS):
+    """Read a food from the persistent cache tier into ai_nutrition_cache (None if missing or too old)"""
+    try:
+        # Own app context: this also runs on ai_lookup_executor threads
+        with app.app_context():
+            entry = db.session.get(AINutritionCacheEntry, food_name_lower)
+            if not entry:
+                return None
+            
+            if datetime.utcnow() - entry.cached_at >= timedelta(hours=max_age_hours):
+                return None
+            
+            nutrition_data = json.loads(entry.data)
+            ai_nutrition_cache[food_name_lower] = {
+                'data': nutrition_data,
+                'cached_at': entry.cached_at
+            }
+            return nutrition_data
+    except Exception as e:
+        app.logger.error(f"Error reading persistent AI cache for '{food_name_lower}': {e}")
+        return None
+
+
+def persist_ai_nutrition(food_name_lower, nutrition_data, cached_at):
+    """Write-through a fresh AI nutrition estimate to the persistent cache tier"""
+    try:
+        with app.app_context():
+            db.session.merge(AINutritionCacheEntry(
+                food_name=food_name_lower,
+                data=json.dumps(nutrition_data),
+                cached_at=cached_at
+            ))
+            db.session.commit()
+    except Exception as e:
+        app.logger.error(f"Error persisting AI cache entry for '{food_name_lower}': {e}")
 
-def load_food_database():
-    """Load food database from JSON file on startup"""
-    global food_database, food_lookup
+
+def single_flight(key, fn, *args):
+    """Call fn(*args), or wait for the identical call already in flight for this key"""
+    with ai_inflight_lock:
+        future = ai_inflight_calls.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            ai_inflight_calls[key] = future
     
-    json_file_path = 'attached_assets/food_items_db_1753605645874.json'
+    if not is_leader:
+        app.logger.info(f"Coalescing {key[0]} lookup for '{key[1]}' with in-flight call")
+        try:
+            return future.result(timeout=AI_LOOKUP_DEADLINE_SECONDS)
+        except Exception as e:
+            app.logger.error(f"Coalesced {key[0]} lookup for '{key[1]}' failed: {e}")
+            return None
     
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as file:
-            food_database = json.load(file)
-        
-        food_lookup = {}
-        for food_item in food_database:
-            food_name_lower = food_item['name'].lower()
-            food_lookup[food_name_lower] = food_item
-        
-        app.logger.info(f"Successfully loaded {len(food_database)} food items from database")
-        
-    except FileNotFoundError:
-        app.logger.error(f"Food database file not found: {json_file_path}")
-        food_database = []
-        food_lookup = {}
-    except json.JSONDecodeError as e:
-        app.logger.error(f"Error parsing JSON file: {e}")
-        food_database = []
-        food_lookup = {}
+        result = fn(*args)
+        future.set_result(result)
+        return result
     except Exception as e:
-        app.logger.error(f"Unexpected error loading food database: {e}")
-        food_database = []
-        food_lookup = {}
+        future.set_exception(e)
+        raise
+    finally:
+        with ai_inflight_lock:
+            ai_inflight_calls.pop(key, None)
+
+
+def schedule_background_refresh(key, fn, *args):
+    """Refresh a cache entry off the request path, unless a refresh is already running"""
+    with ai_inflight_lock:
+        if key in ai_inflight_calls:
+            return
+    
+    ai_lookup_executor.submit(single_flight, key, fn, *args)
 
 
-def get_nutrition_from_ai(food_name):
-    """Get nutrition information from OpenAI for unknown food items (with caching)"""
-    global ai_nutrition_cache
-    
+def get_nutrition_from_ai(food_name, cache_only=False):
+    """Get nutrition information from OpenAI for unknown food items (with caching; cache_only skips OpenAI)"""
     food_name_lower = food_name.lower().strip()
     
     # Check cache first
-    if food_name_lower in ai_nutrition_cache:
-        cached_entry = ai_nutrition_cache[food_name_lower]
+    cached_entry = ai_nutrition_cache.get(food_name_lower)
+    if cached_entry:
         cache_age = datetime.utcnow() - cached_entry['cached_at']
+        expiry = timedelta(hours=AI_CACHE_EXPIRY_HOURS)
         
         # Return cached data if not expired
-        if cache_age < timedelta(hours=AI_CACHE_EXPIRY_HOURS):
+        if cache_age < expiry:
+            # Close to expiry: serve it, but refresh in the background so it never goes cold
+            if cache_age >= expiry - timedelta(hours=AI_CACHE_REFRESH_AHEAD_HOURS):
+                schedule_background_refresh(('nutrition', food_name_lower), refresh_nutrition_from_ai, food_name)
             app.logger.info(f"Cache HIT for '{food_name}' (age: {cache_age.seconds // 60} minutes)")
+            AI_NUTRITION_CACHE_LOOKUPS.labels('hit').inc()
+            return cached_entry['data']
+        elif cache_age < expiry + timedelta(hours=AI_CACHE_STALE_GRACE_HOURS):
+            # Serve stale data while a fresh estimate is fetched
+            schedule_background_refresh(('nutrition', food_name_lower), refresh_nutrition_from_ai, food_name)
+            app.logger.info(f"Cache STALE for '{food_name}', serving cached data while refreshing")
+            AI_NUTRITION_CACHE_LOOKUPS.labels('stale').inc()
             return cached_entry['data']
         else:
             # Remove expired entry
-            del ai_nutrition_cache[food_name_lower]
+            ai_nutrition_cache.pop(food_name_lower, None)
             app.logger.info(f"Cache EXPIRED for '{food_name}', fetching fresh data")
+            AI_NUTRITION_CACHE_LOOKUPS.labels('expired').inc()
+    
+    # Another worker or instance may already have estimated this food
+    persisted_data = load_persisted_ai_nutrition(food_name_lower)
+    if persisted_data:
+        app.logger.info(f"Persistent cache HIT for '{food_name}'")
+        AI_NUTRITION_CACHE_LOOKUPS.labels('persistent_hit').inc()
+        return persisted_data
+    
+    AI_NUTRITION_CACHE_LOOKUPS.labels('miss').inc()
+    if cache_only:
+        return None
+    return single_flight(('nutrition', food_name_lower), fetch_nutrition_from_ai, food_name)
+
+
+def refresh_nutrition_from_ai(food_name):
+    """Background refresh: reuse a newer persisted estimate if another worker already refreshed"""
+    fresh_hours = AI_CACHE_EXPIRY_HOURS - AI_CACHE_REFRESH_AHEAD_HOURS
+    persisted_data = load_persisted_ai_nutrition(food_name.lower().strip(), max_age_hours=fresh_hours)
+    if persisted_data:
+        return persisted_data
+    
+    return fetch_nutrition_from_ai(food_name)
+
+
+def validate_ai_nutrition(food_name, nutrition_data):
+    """Check an AI nutrition estimate has every key with numeric GI/carbs/fiber; returns it (cast) or None"""
+    if not isinstance(nutrition_data, dict):
+        app.logger.error(f"Invalid nutrition data structure from AI for '{food_name}': {nutrition_data}")
+        return None
+    
+    required_keys = ['gi', 'carbs_per_unit', 'fiber_per_unit', 'unit', 'unit_desc']
+    if not all(key in nutrition_data for key in required_keys):
+        app.logger.error(f"Invalid nutrition data structure from AI for '{food_name}': {nutrition_data}")
+        return None
     
     try:
-        if not openai_client:
-            app.logger.error("OpenAI client not available for nutrition lookup")
-            return None
-        
+        nutrition_data['gi'] = float(nutrition_data['gi'])
+        nutrition_data['carbs_per_unit'] = float(nutrition_data['carbs_per_unit'])
+        nutrition_data['fiber_per_unit'] = float(nutrition_data['fiber_per_unit'])
+    except (ValueError, TypeError):
+        app.logger.error(f"Invalid nutrition data types from AI for '{food_name}': {nutrition_data}")
+        return None
+    
+    return nutrition_data
+
+
+def cache_ai_nutrition(food_name, nutrition_data):
+    """Store a fresh AI estimate in the in-process and persistent cache tiers"""
+    food_name_lower = food_name.lower().strip()
+    cached_at = datetime.utcnow()
+    ai_nutrition_cache[food_name_lower] = {
+        'data': nutrition_data,
+        'cached_at': cached_at
+    }
+    persist_ai_nutrition(food_name_lower, nutrition_data, cached_at)
+    app.logger.info(f"Cached AI nutrition data for '{food_name}' (cache size: {len(ai_nutrition_cache)})")
+
+
+def fetch_nutrition_from_ai(food_name):
+    """Call OpenAI for a food's nutrition and store the result in both cache tiers"""
+    try:
         app.logger.info(f"Cache MISS for '{food_name}', calling OpenAI API")
         
         system_prompt = """Give glycemic index (GI), carbs per unit (in grams), fiber per unit (in grams), unit, and unit_desc for one serving of the specified food item.
@@ -727,55 +2045,145 @@ Example for 'Kheer':
   "unit_desc": "1 bowl = 150g, milk and rice-based sweet dish"
 }"""
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Get nutrition info for: {food_name}"}
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=300,
-            temperature=0.3
-        )
-        
-        gpt_response = response.choices[0].message.content
-        if not gpt_response:
-            app.logger.error(f"Empty response from AI for {food_name}")
-            return None
-        nutrition_data = json.loads(gpt_response)
-        
-        required_keys = ['gi', 'carbs_per_unit', 'fiber_per_unit', 'unit', 'unit_desc']
-        if not all(key in nutrition_data for key in required_keys):
-            app.logger.error(f"Invalid nutrition data structure from AI: {nutrition_data}")
-            return None
-        
-        try:
-            nutrition_data['gi'] = float(nutrition_data['gi'])
-            nutrition_data['carbs_per_unit'] = float(nutrition_data['carbs_per_unit'])
-            nutrition_data['fiber_per_unit'] = float(nutrition_data['fiber_per_unit'])
-        except (ValueError, TypeError):
-            app.logger.error(f"Invalid nutrition data types from AI: {nutrition_data}")
+        nutrition_data = request_ai_json('estimate', system_prompt, f"Get nutrition info for: {food_name}", max_tokens=300)
+        nutrition_data = validate_ai_nutrition(food_name, nutrition_data) if nutrition_data is not None else None
+        if nutrition_data is None:
             return None
         
-        # Cache the successful response
-        ai_nutrition_cache[food_name_lower] = {
-            'data': nutrition_data,
-            'cached_at': datetime.utcnow()
-        }
-        app.logger.info(f"Cached AI nutrition data for '{food_name}' (cache size: {len(ai_nutrition_cache)})")
-        
+        cache_ai_nutrition(food_name, nutrition_data)
         return nutrition_data
         
-    except json.JSONDecodeError as e:
-        app.logger.error(f"Failed to parse AI nutrition JSON response: {e}")
-        return None
     except Exception as e:
         app.logger.error(f"Error getting nutrition from AI for {food_name}: {e}")
         return None
 
 
+NUTRITION_BATCH_SYSTEM_PROMPT = """Give glycemic index (GI), carbs per unit (in grams), fiber per unit (in grams), unit, and unit_desc for one serving of each specified food item.
+Return only JSON with an "items" key containing one object per food item, with keys: name (exactly as given), gi, carbs_per_unit, fiber_per_unit, unit, unit_desc.
+
+Example for ["Kheer"]:
+{
+  "items": [
+    {
+      "name": "Kheer",
+      "gi": 45,
+      "carbs_per_unit": 28,
+      "fiber_per_unit": 1,
+      "unit": "bowl",
+      "unit_desc": "1 bowl = 150g, milk and rice-based sweet dish"
+    }
+  ]
+}"""
+
+
+def fetch_nutrition_batch_from_ai(food_names):
+    """Estimate several foods in one OpenAI call, validating and caching each item; returns {food_name: data or None}"""
+    if len(food_names) == 1:
+        return {food_names[0]: fetch_nutrition_from_ai(food_names[0])}
+    
+    app.logger.info(f"Cache MISS for {len(food_names)} foods, calling OpenAI API once for {food_names}")
+    requested = {food_name.lower().strip(): food_name for food_name in food_names}
+    results = {}
+    
+    batch_data = request_ai_json(
+        'estimate',
+        NUTRITION_BATCH_SYSTEM_PROMPT,
+        f"Get nutrition info for each of: {json.dumps(food_names)}",
+        max_tokens=NUTRITION_BATCH_TOKENS_PER_ITEM * len(food_names) + 100
+    )
+    entries = batch_data.get('items') if batch_data else None
+    if batch_data is not None and not isinstance(entries, list):
+        app.logger.error(f"Unexpected AI nutrition batch response format: {batch_data}")
+        entries = None
+    
+    for entry in entries or []:
+        if not isinstance(entry, dict):
+            continue
+        food_name = requested.get(str(entry.pop('name', '')).lower().strip())
+        if food_name is None or food_name in results:
+            continue
+        
+        nutrition_data = validate_ai_nutrition(food_name, entry)
+        if nutrition_data is not None:
+            cache_ai_nutrition(food_name, nutrition_data)
+        results[food_name] = nutrition_data
+    
+    if entries is None:
+        # The whole call failed (breaker, retries exhausted, bad JSON): don't make it worse with N more calls
+        return {food_name: None for food_name in food_names}
+    
+    for food_name in food_names:
+        if food_name not in results:
+            # Left out of the reply (or renamed): ask for it on its own
+            results[food_name] = fetch_nutrition_from_ai(food_name)
+    return results
+
+
+def coalesced_nutrition_batch(food_names):
+    """fetch_nutrition_batch_from_ai, sharing single-flight calls with concurrent lookups of the same foods"""
+    owned, shared = {}, {}
+    with ai_inflight_lock:
+        for food_name in food_names:
+            key = ('nutrition', food_name.lower().strip())
+            future = ai_inflight_calls.get(key)
+            if future is None:
+                future = Future()
+                ai_inflight_calls[key] = future
+                owned[food_name] = (key, future)
+            else:
+                shared[food_name] = future
+    
+    results = {}
+    try:
+        if owned:
+            results.update(fetch_nutrition_batch_from_ai(list(owned)))
+        for food_name, (_, future) in owned.items():
+            future.set_result(results.get(food_name))
+    except Exception as e:
+        for _, future in owned.values():
+            if not future.done():
+                future.set_exception(e)
+        raise
+    finally:
+        with ai_inflight_lock:
+            for key, _ in owned.values():
+                ai_inflight_calls.pop(key, None)
+    
+    for food_name, future in shared.items():
+        app.logger.info(f"Coalescing nutrition lookup for '{food_name}' with in-flight call")
+        try:
+            results[food_name] = future.result(timeout=AI_LOOKUP_DEADLINE_SECONDS)
+        except Exception as e:
+            app.logger.error(f"Coalesced nutrition lookup for '{food_name}' failed: {e}")
+            results[food_name] = None
+    return results
+
+
+def get_nutrition_batch_from_ai(food_names):
+    """Nutrition for every unknown food of a meal: cache hits first, then batched OpenAI calls for the misses"""
+    results = {}
+    misses = []
+    for food_name in dict.fromkeys(food_names):
+        nutrition_data = get_nutrition_from_ai(food_name, cache_only=True)
+        if nutrition_data:
+            results[food_name] = nutrition_data
+        else:
+            misses.append(food_name)
+    
+    # Very large meals are split so each reply stays well inside max_tokens; chunks run in parallel
+    chunks = [tuple(misses[start:start + NUTRITION_BATCH_MAX_ITEMS]) for start in range(0, len(misses), NUTRITION_BATCH_MAX_ITEMS)]
+    chunk_results = run_ai_lookups_concurrently(coalesced_nutrition_batch, chunks)
+    for chunk in chunks:
+        estimates = chunk_results.get(chunk) or {}
+        for food_name in chunk:
+            results[food_name] = estimates.get(food_name)
+    return results
+
+
 def calculate_glycemic_load(food_item, quantity):
     """Calculate glycemic load for a food item"""
+    if isinstance(food_item, FoodRecord):
+        return round(food_item.gl_per_unit * quantity, 2)
     try:
         gi = food_item['gi']
         carbs_per_unit = food_item['carbs_per_unit']
@@ -790,6 +2198,12 @@ def calculate_glycemic_load(food_item, quantity):
         return 0
 
 
+def meal_signature(meal_items, total_gl):
+    """Canonical meal key for suggestions: sorted distinct foods plus a bucketed total GL"""
+    foods = sorted({str(item.get('food', '')).lower().strip() for item in meal_items})
+    return (tuple(foods), int(total_gl // SUGGESTIONS_GL_BUCKET_SIZE))
+
+
 def get_meal_suggestions(meal_items, total_gl):
     """Get AI-powered meal improvement suggestions"""
     try:
@@ -797,11 +2211,13 @@ def get_meal_suggestions(meal_items, total_gl):
             app.logger.info(f"Skipping suggestions: GL {total_gl} is low (threshold > 10)")
             return []
         
+        signature = meal_signature(meal_items, total_gl)
+        cached_suggestions = suggestions_cache.get(signature)
+        if cached_suggestions is not None:
+            app.logger.info(f"Suggestions cache HIT for {signature}")
+            return cached_suggestions
+        
         app.logger.info(f"Generating suggestions for GL {total_gl} (above threshold of 10)")
-            
-        if not openai_client:
-            app.logger.error("OpenAI client not available for suggestions")
-            return []
         
         meal_description = []
         for item in meal_items:
@@ -826,23 +2242,19 @@ GUIDELINES:
 
 Return ONLY valid JSON with "suggestions" array containing objects with "text" and "reason" keys."""
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Meal:\n{meal_text}\nTotal GL: {total_gl:.1f}\n\nProvide improvement suggestions."}
-            ],
-            response_format={"type": "json_object"},
+        suggestions_data = request_ai_json(
+            'suggestions',
+            system_prompt,
+            f"Meal:\n{meal_text}\nTotal GL: {total_gl:.1f}\n\nProvide improvement suggestions.",
             max_tokens=800,
             temperature=0.4
         )
-        
-        gpt_response = response.choices[0].message.content
-        if not gpt_response:
+        if suggestions_data is None:
             return []
-        suggestions_data = json.loads(gpt_response)
         
         if 'suggestions' in suggestions_data and isinstance(suggestions_data['suggestions'], list):
+            if suggestions_data['suggestions']:
+                suggestions_cache.set(signature, suggestions_data['suggestions'])
             return suggestions_data['suggestions']
         else:
             app.logger.error(f"Invalid suggestions response format: {suggestions_data}")
@@ -853,36 +2265,166 @@ Return ONLY valid JSON with "suggestions" array containing objects with "text" a
         return []
 
 
-def find_similar_food_portions(food_name):
+def start_suggestions_job(user_id, meal_items, total_gl):
+    """Return (suggestions, job_id): cached or skipped suggestions inline, otherwise a background job id"""
+    if total_gl <= 10:
+        app.logger.info(f"Skipping suggestions: GL {total_gl} is low (threshold > 10)")
+        return [], None
+    
+    cached_suggestions = suggestions_cache.get(meal_signature(meal_items, total_gl))
+    if cached_suggestions is not None:
+        return cached_suggestions, None
+    
+    if ai_degraded():
+        return [], None
+    
+    job_id = uuid.uuid4().hex
+    db.session.add(SuggestionJob(id=job_id, user_id=user_id))
+    db.session.commit()
+    
+    future = suggestions_executor.submit(run_suggestions_job, job_id, list(meal_items), total_gl)
+    suggestion_job_futures.set(job_id, future)
+    return [], job_id
+
+
+def run_suggestions_job(job_id, meal_items, total_gl):
+    """Generate suggestions for a job and store them on its row"""
+    suggestions = get_meal_suggestions(meal_items, total_gl)
+    
+    with app.app_context():
+        try:
+            job = db.session.get(SuggestionJob, job_id)
+            if job:
+                job.status = 'done'
+                job.suggestions = json.dumps(suggestions)
+            cutoff = datetime.utcnow() - timedelta(seconds=SUGGESTIONS_JOB_TTL_SECONDS)
+            SuggestionJob.query.filter(SuggestionJob.created_at < cutoff).delete()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error storing suggestions for job {job_id}: {e}")
+    
+    return suggestions
+
+
+def find_foods_containing(catalog, text):
+    """Positions of foods whose lowercase name contains text (trigram index, then verified)"""
+    if len(text) < 3:
+        return {position for position, name in enumerate(catalog.names_lower) if text in name}
+    
+    postings = []
+    for start in range(len(text) - 2):
+        trigram_postings = catalog.trigram_index.get(text[start:start + 3])
+        if not trigram_postings:
+            return set()
+        postings.append(trigram_postings)
+    
+    # Intersect smallest posting lists first
+    postings.sort(key=len)
+    candidates = set(postings[0])
+    for trigram_postings in postings[1:]:
+        candidates &= trigram_postings
+        if not candidates:
+            return set()
+    
+    return {position for position in candidates if text in catalog.names_lower[position]}
+
+
+def find_foods_with_word_in(catalog, text):
+    """Positions of foods having a name word (3+ chars) that appears anywhere inside text"""
+    positions = set()
+    for start in range(len(text)):
+        for end in range(start + 3, min(len(text), start + catalog.token_max_length) + 1):
+            positions.update(catalog.token_index.get(text[start:end], ()))
+    return positions
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two short strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def fuzzy_match_food(catalog, food_name):
+    """Resolve a misspelled or variant food name to a curated food.
+    
+    Scores blend trigram overlap (Dice) with normalized edit distance. Returns
+    (food_item, score) when the best food clears FUZZY_MATCH_THRESHOLD and beats the
+    runner-up by FUZZY_MATCH_MARGIN, otherwise (None, best_score).
+    """
+    query = normalize_food_name(food_name)
+    if not query:
+        return None, 0.0
+    
+    # Also try the query with simple plurals removed ("pooris" -> "poori")
+    variants = {query, " ".join(word[:-1] if len(word) > 3 and word.endswith('s') else word for word in query.split())}
+    
+    best_scores = {}  # {position: score}
+    for variant in variants:
+        variant_trigrams = food_name_trigrams(variant)
+        
+        shared_counts = {}
+        for trigram in variant_trigrams:
+            for key_id in catalog.fuzzy_trigram_index.get(trigram, ()):
+                shared_counts[key_id] = shared_counts.get(key_id, 0) + 1
+        
+        dice_scores = {
+            key_id: 2 * shared / (len(variant_trigrams) + catalog.fuzzy_keys[key_id][2])
+            for key_id, shared in shared_counts.items()
+        }
+        top_key_ids = sorted(dice_scores, key=dice_scores.get, reverse=True)[:FUZZY_MATCH_CANDIDATES]
+        
+        for key_id in top_key_ids:
+            key, position, _ = catalog.fuzzy_keys[key_id]
+            edit_score = 1 - edit_distance(variant, key) / max(len(variant), len(key))
+            score = (dice_scores[key_id] + edit_score) / 2
+            if score > best_scores.get(position, 0):
+                best_scores[position] = score
+    
+    if not best_scores:
+        return None, 0.0
+    
+    ranked = sorted(best_scores.items(), key=lambda entry: entry[1], reverse=True)
+    best_position, best_score = ranked[0]
+    runner_up_score = ranked[1][1] if len(ranked) > 1 else 0.0
+    
+    if best_score >= FUZZY_MATCH_THRESHOLD and best_score - runner_up_score >= FUZZY_MATCH_MARGIN:
+        return catalog.records[best_position], round(best_score, 3)
+    return None, round(best_score, 3)
+
+
+def find_similar_food_portions(catalog, food_name):
     """Find similar foods in database for portion size reference"""
-    food_name_lower = food_name.lower()
-    food_words = food_name_lower.split()
-    
-    similar_foods = []
-    for item in food_database:
-        item_name_lower = item['name'].lower()
-        item_words = item_name_lower.split()
-        
-        common_words = set(food_words) & set(item_words)
-        common_words = common_words - {'with', 'and', 'in', 'of', 'the', 'a', 'an', 'or'}
-        
-        if len(common_words) > 0:
-            similar_foods.append({
-                'name': item['name'],
-                'unit_desc': item['unit_desc'],
-                'common_words': len(common_words)
-            })
+    food_words = set(food_name.lower().split()) - {'with', 'and', 'in', 'of', 'the', 'a', 'an', 'or'}
     
-    similar_foods.sort(key=lambda x: x['common_words'], reverse=True)
+    # Count shared words per food straight from the word index
+    common_word_counts = {}
+    for word in food_words:
+        for position in catalog.token_index.get(word, ()):
+            common_word_counts[position] = common_word_counts.get(position, 0) + 1
     
-    return similar_foods[:3]
+    ranked_positions = sorted(common_word_counts, key=lambda position: (-common_word_counts[position], position))
+    
+    return [{
+        'name': catalog.foods[position]['name'],
+        'unit_desc': catalog.foods[position]['unit_desc'],
+        'common_words': common_word_counts[position]
+    } for position in ranked_positions[:3]]
 
 
 def get_ai_portion_description(food_name):
     """Get AI-generated portion description for unknown foods"""
-    if not openai_client:
-        return f"1 serving (typical portion for {food_name})"
-    
     try:
         prompt = f"""Provide typical portion sizes for "{food_name}" in Indian cuisine context.
 
@@ -890,21 +2432,9 @@ Return a JSON object with "unit_desc" containing a brief, practical description
 
 Keep it concise and practical. Return only JSON format: {{"unit_desc": "description"}}"""
 
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a nutrition expert providing portion size guidance."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=200,
-            temperature=0.3
-        )
-        
-        result_content = response.choices[0].message.content
-        if not result_content:
+        result = request_ai_json('portion', "You are a nutrition expert providing portion size guidance.", prompt, max_tokens=200)
+        if result is None:
             return f"1 serving (typical portion for {food_name})"
-        result = json.loads(result_content)
         return result.get('unit_desc', f"1 serving (typical portion)")
         
     except Exception as e:
@@ -912,6 +2442,181 @@ Keep it concise and practical. Return only JSON format: {{"unit_desc": "descript
         return f"1 serving (typical portion for {food_name})"
 
 
+# ============================================
+# LOCAL MEAL PARSING (fast path before GPT)
+# ============================================
+
+MEAL_SEPARATOR_PATTERN = re.compile(r"\s*(?:,|;|\+|&|\n|\band\b|\bwith\b|\bplus\b|\balong with\b)\s*")
+FRACTION_PATTERN = re.compile(r"^(?:(\d+)\s+)?(\d+)\s*/\s*(\d+)\s*")  # "1/2", "1 1/2"
+QUANTITY_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*(?:x\s*)?")  # "2", "1.5", "2x"
+TRAILING_QUANTITY_PATTERN = re.compile(r"\s+(?:x\s*)?(\d+(?:\.\d+)?)$")
+UNICODE_FRACTIONS = {'½': ' 1/2', '¼': ' 1/4', '¾': ' 3/4', '⅓': ' 1/3', '⅔': ' 2/3'}
+NUMBER_WORDS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12,
+    'half': 0.5, 'quarter': 0.25, 'couple': 2, 'dozen': 12, 'single': 1, 'double': 2
+}
+PORTION_WORDS = {
+    'bowl', 'bowls', 'plate', 'plates', 'piece', 'pieces', 'pc', 'pcs', 'cup', 'cups',
+    'glass', 'glasses', 'katori', 'katoris', 'serving', 'servings', 'slice', 'slices',
+    'spoon', 'spoons', 'tbsp', 'tsp', 'handful', 'handfuls', 'small', 'medium', 'large', 'big'
+}
+FILLER_WORDS = {'of', 'some', 'little', 'few', 'my', 'the', 'had', 'ate', 'i', 'for', 'about', 'approx'}
+
+
+def format_quantity(quantity):
+    """Render whole quantities as ints, like GPT does"""
+    return int(quantity) if float(quantity).is_integer() else round(quantity, 2)
+
+
+def extract_quantity(segment):
+    """Split a meal segment into (quantity, remaining words); quantity defaults to 1"""
+    for fraction, replacement in UNICODE_FRACTIONS.items():
+        segment = segment.replace(fraction, replacement)
+    segment = segment.strip()
+    
+    # Leading filler: "i had 2 eggs", "some rice"
+    words = segment.split()
+    while words and words[0] in FILLER_WORDS:
+        words.pop(0)
+    segment = " ".join(words)
+    
+    quantity = None
+    fraction_match = FRACTION_PATTERN.match(segment)
+    number_match = QUANTITY_PATTERN.match(segment)
+    if fraction_match and int(fraction_match.group(3)) != 0:
+        quantity = int(fraction_match.group(1) or 0) + int(fraction_match.group(2)) / int(fraction_match.group(3))
+        segment = segment[fraction_match.end():]
+    elif number_match:
+        quantity = float(number_match.group(1))
+        segment = segment[number_match.end():]
+    
+    words = segment.split()
+    
+    # Number words: "two idli", "half a bowl of rice", "a couple of rotis"
+    while words and words[0] in NUMBER_WORDS:
+        value = NUMBER_WORDS[words.pop(0)]
+        if quantity is None:
+            quantity = value
+        elif value < 1:
+            quantity *= value
+        elif value > 1 and quantity == 1:
+            quantity = value
+    
+    if quantity is None:
+        match = TRAILING_QUANTITY_PATTERN.search(" ".join(words))
+        if match:
+            quantity = float(match.group(1))
+            words = " ".join(words)[:match.start()].split()
+    
+    return (quantity if quantity and quantity > 0 else 1), words
+
+
+def normalize_meal_word(catalog, word):
+    """Map plurals onto catalog words ("rotis" -> "roti") when the singular is known"""
+    if word not in catalog.token_index:
+        for suffix in ('es', 's'):
+            if word.endswith(suffix) and word[:-len(suffix)] in catalog.token_index:
+                return word[:-len(suffix)]
+    return word
+
+
+def split_meal_span(catalog, segment):
+    """Split a meal span into (quantity, food words), dropping portion/filler words and normalizing plurals"""
+    quantity, words = extract_quantity(segment)
+    words = [
+        normalize_meal_word(catalog, word)
+        for word in re.sub(r"[^a-z0-9\s()'-]", " ", " ".join(words)).split()
+        if word not in PORTION_WORDS and word not in FILLER_WORDS
+    ]
+    return quantity, words
+
+
+def parse_meal_locally(catalog, meal_text, require_catalog_food=False):
+    """Parse a meal without GPT.
+    
+    Returns (items, unresolved_spans). A span is resolved when it is an exact or fuzzy
+    catalog food, or (unless require_catalog_food) when every word is a catalog word,
+    e.g. "dal" or "masala dosa". Resolved items use the catalog name when there is one.
+    Each unresolved span leaves a None slot in items, so fill_unresolved_slots can put
+    its foods back where the user wrote them.
+    """
+    text = meal_text.lower()
+    items = []
+    unresolved_spans = []
+    
+    for segment in MEAL_SEPARATOR_PATTERN.split(text):
+        if not segment or not segment.strip():
+            continue
+        
+        quantity, words = split_meal_span(catalog, segment)
+        food_name = " ".join(words)
+        
+        if not food_name or not re.search(r"[a-z]", food_name):
+            items.append(None)
+            unresolved_spans.append(segment.strip())
+            continue
+        
+        food_item = catalog.lookup.get(food_name)
+        if not food_item:
+            food_item, _ = fuzzy_match_food(catalog, food_name)
+        
+        if food_item:
+            items.append({'food': food_item['name'], 'quantity': format_quantity(quantity)})
+        elif not require_catalog_food and all(word in catalog.token_index for word in words):
+            items.append({'food': food_name, 'quantity': format_quantity(quantity)})
+        else:
+            items.append(None)
+            unresolved_spans.append(segment.strip())
+    
+    return items, unresolved_spans
+
+
+def meal_words(text):
+    """Lowercase words of a span or food name, for lining GPT items up with spans"""
+    return [word for word in re.findall(r"[a-z]+", text.lower()) if len(word) > 2]
+
+
+def fill_unresolved_slots(items, unresolved_spans, span_items):
+    """Replace the None slots from parse_meal_locally with the foods parsed from each span.
+    
+    span_items is a flat list in text order (GPT answers the joined spans in order).
+    Items are walked forward: each goes to the first span from the current one on that
+    shares a word stem with it ("pooris" -> "Poori"), otherwise it stays with the current one.
+    """
+    span_word_lists = [meal_words(span) for span in unresolved_spans]
+    items_by_span = [[] for _ in unresolved_spans]
+    current = 0
+    
+    for item in span_items:
+        item_words = meal_words(str(item.get('food', ''))) if isinstance(item, dict) else []
+        for index in range(current, len(unresolved_spans)):
+            if any(a[:4] == b[:4] for a in span_word_lists[index] for b in item_words):
+                current = index
+                break
+        if items_by_span:
+            items_by_span[current].append(item)
+    
+    filled = []
+    slots = iter(items_by_span)
+    for item in items:
+        if item is None:
+            filled.extend(next(slots, []))
+        else:
+            filled.append(item)
+    return filled
+
+
+def call_gpt_meal_parser(system_prompt, meal_text):
+    """Ask GPT to split meal text into [{"food", "quantity"}] (None if the call or reply is unusable)"""
+    parsed_response = request_ai_json('parse', system_prompt, f"Parse this meal: {meal_text}", max_tokens=500)
+    if parsed_response is None:
+        return None
+    
+    meal_array = parsed_response.get('meal')
+    return meal_array if isinstance(meal_array, list) else None
+
+
 # ============================================
 # PROTECTED AI ENDPOINTS (require auth + limit)
 # ============================================
@@ -943,8 +2648,10 @@ def calculate_gl():
                 'message': '"meal" must be an array of food items'
             }), 400
         
+        catalog = food_catalog
         total_gl = 0
         items = []
+        pending_ai_items = []  # [(index in items, food_name, quantity, unit)]
         
         for meal_item in meal:
             if not isinstance(meal_item, dict) or 'food' not in meal_item or 'quantity' not in meal_item:
@@ -960,11 +2667,11 @@ def calculate_gl():
             
             try:
                 quantity = float(quantity)
-                if quantity <= 0:
+                if not math.isfinite(quantity) or not 0 < quantity <= MAX_ITEM_QUANTITY:
                     items.append({
                         'food': food_name,
                         'status': 'invalid_quantity',
-                        'message': 'Quantity must be a positive number'
+                        'message': f'Quantity must be a positive number up to {MAX_ITEM_QUANTITY}'
                     })
                     continue
             except (ValueError, TypeError):
@@ -979,9 +2686,17 @@ def calculate_gl():
             unit = meal_item.get('unit', 'serving')
             source = meal_item.get('source', 'database')
             
-            if food_name_lower in food_lookup:
-                food_item = food_lookup[food_name_lower]
-                gl = calculate_glycemic_load(food_item, quantity)
+            food_item = catalog.lookup.get(food_name_lower)
+            matched_food = None
+            signed_nutrition = None if food_item else decode_nutrition_token(meal_item.get('nutrition_token'), food_name)
+            if not food_item and not signed_nutrition:
+                # Misspellings of curated foods resolve locally instead of going to GPT
+                food_item, _ = fuzzy_match_food(catalog, food_name)
+                matched_food = food_item['name'] if food_item else None
+            
+            if signed_nutrition:
+                # Already estimated on /parse-meal-smart and signed by us: no second AI call
+                gl = calculate_glycemic_load(signed_nutrition, quantity)
                 total_gl += gl
                 
                 items.append({
@@ -989,47 +2704,266 @@ def calculate_gl():
                     'gl': gl,
                     'quantity': quantity,
                     'unit': unit,
-                    'source': source
+                    'status': 'ai_estimated'
                 })
+            elif food_item:
+                gl = calculate_glycemic_load(food_item, quantity)
+                total_gl += gl
+                
+                result_item = {
+                    'food': food_name,
+                    'gl': gl,
+                    'quantity': quantity,
+                    'unit': unit,
+                    'source': source
+                }
+                if matched_food:
+                    result_item['matched_food'] = matched_food
+                items.append(result_item)
             else:
-                ai_nutrition = get_nutrition_from_ai(food_name)
+                # Resolved below, once every unknown food has been looked up (batched into one AI call)
+                pending_ai_items.append((len(items), food_name, quantity, unit))
+                items.append(None)
+        
+        pending_names = [food_name for _, food_name, _, _ in pending_ai_items]
+        degraded = ai_degraded()
+        if degraded:
+            # OpenAI is failing or slow: unknown foods resolve from the AI caches or come back not_found
+            ai_results = {food_name: get_nutrition_from_ai(food_name, cache_only=True) for food_name in pending_names}
+        else:
+            # Cache misses go to OpenAI together, one call per meal instead of one per food
+            ai_results = get_nutrition_batch_from_ai(pending_names)
+        
+        for index, food_name, quantity, unit in pending_ai_items:
+            ai_nutrition = ai_results.get(food_name)
+            
+            if ai_nutrition:
+                gl = calculate_glycemic_load(ai_nutrition, quantity)
+                total_gl += gl
                 
-                if ai_nutrition:
-                    gl = calculate_glycemic_load(ai_nutrition, quantity)
-                    total_gl += gl
-                    
-                    items.append({
-                        'food': food_name,
-                        'gl': gl,
-                        'quantity': quantity,
-                        'unit': unit,
-                        'status': 'ai_estimated'
-                    })
-                else:
-                    items.append({
-                        'food': food_name,
-                        'quantity': quantity,
-                        'unit': unit,
-                        'status': 'not_found'
-                    })
+                items[index] = {
+                    'food': food_name,
+                    'gl': gl,
+                    'quantity': quantity,
+                    'unit': unit,
+                    'status': 'ai_estimated'
+                }
+            else:
+                items[index] = {
+                    'food': food_name,
+                    'quantity': quantity,
+                    'unit': unit,
+                    'status': 'not_found'
+                }
         
-        suggestions = get_meal_suggestions(items, total_gl)
+        # Suggestions don't hold up the response: the results page fetches them from /suggestions/<job_id>
+        suggestions, suggestions_job_id = start_suggestions_job(request.current_user.id, items, total_gl)
         
         response = {
             'total_gl': round(total_gl, 2),
             'items': items,
             'suggestions': suggestions,
+            'suggestions_job_id': suggestions_job_id,
+            'degraded': degraded,
+            'usage': {
+                'used_today': request.usage_count,
+                'daily_limit': DAILY_MEAL_LIMIT,
+                'remaining': DAILY_MEAL_LIMIT - request.usage_count
+            }
+        }
+        
+        return jsonify(response)
+    
+    except Exception as e:
+        app.logger.error(f"Unexpected error in calculate_gl: {e}")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': 'An unexpected error occurred while processing your request'
+        }), 500
+
+
+@app.route('/suggestions/<job_id>', methods=['GET'])
+@require_auth
+def get_suggestions_job(job_id):
+    """Fetch suggestions for a /calculate-gl job, optionally long-polling with ?wait=<seconds> (PROTECTED)"""
+    try:
+        wait_seconds = min(max(request.args.get('wait', 0, type=float), 0), SUGGESTIONS_LONG_POLL_MAX_SECONDS)
+        deadline = time.monotonic() + wait_seconds
+        
+        job = db.session.get(SuggestionJob, job_id)
+        if not job or job.user_id != request.current_user.id:
+            return jsonify({
+                'error': 'Not found',
+                'message': 'Suggestions job not found or expired'
+            }), 404
+        
+        if job.status == 'pending' and wait_seconds > 0:
+            future = suggestion_job_futures.get(job_id)
+            if future is not None:
+                # Started by this worker: block on the future itself rather than polling the table
+                release_db_connection()
+                wait([future], timeout=wait_seconds)
+            
+            while True:
+                db.session.refresh(job)
+                remaining = deadline - time.monotonic()
+                if job.status != 'pending' or remaining <= 0:
+                    break
+                release_db_connection()
+                time.sleep(min(SUGGESTIONS_POLL_INTERVAL_SECONDS, remaining))
+        
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'suggestions': json.loads(job.suggestions) if job.suggestions else []
+        })
+    
+    except Exception as e:
+        app.logger.error(f"Unexpected error in get_suggestions_job: {e}")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': 'An unexpected error occurred while fetching suggestions'
+        }), 500
+
+
+@app.route('/calculate-gl/batch', methods=['POST'])
+@require_auth_with_limit
+def calculate_gl_batch():
+    """Score many meals in one vectorized pass (PROTECTED - counts as a single daily-limit event)"""
+    try:
+        if not request.is_json:
+            return jsonify({
+                'error': 'Request must be JSON',
+                'message': 'Content-Type must be application/json'
+            }), 400
+        
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('meals'), list):
+            return jsonify({
+                'error': 'Invalid request format',
+                'message': 'Request must contain "meals" array of {"id", "meal": [...]} objects'
+            }), 400
+        
+        meals = data['meals']
+        
+        if len(meals) > BATCH_MAX_MEALS:
+            return jsonify({
+                'error': 'Batch too large',
+                'message': f'A batch may contain at most {BATCH_MAX_MEALS} meals'
+            }), 400
+        
+        # Flatten every item into columns; unknown foods get extra rows after the catalog
+        extra_gi, extra_net_carbs, extra_grams = [], [], []
+        resolved_names = {}  # {food_name_lower: (row, status, matched_food)}
+        catalog = food_catalog
+        catalog_size = len(catalog.foods)
+        
+        meal_indexes, rows, quantities, item_refs = [], [], [], []
+        meal_results = []
+        item_count = 0
+        
+        for meal_index, meal_entry in enumerate(meals):
+            meal_items = meal_entry.get('meal') if isinstance(meal_entry, dict) else None
+            meal_result = {
+                'id': meal_entry.get('id', meal_index) if isinstance(meal_entry, dict) else meal_index,
+                'items': []
+            }
+            meal_results.append(meal_result)
+            
+            if not isinstance(meal_items, list):
+                meal_result['status'] = 'invalid_format'
+                meal_result['message'] = '"meal" must be an array of food items'
+                continue
+            
+            for meal_item in meal_items:
+                item_count += 1
+                if item_count > BATCH_MAX_ITEMS:
+                    return jsonify({
+                        'error': 'Batch too large',
+                        'message': f'A batch may contain at most {BATCH_MAX_ITEMS} food items'
+                    }), 400
+                
+                if not isinstance(meal_item, dict) or 'food' not in meal_item or 'quantity' not in meal_item:
+                    meal_result['items'].append({
+                        'food': meal_item.get('food', 'Unknown') if isinstance(meal_item, dict) else 'Unknown',
+                        'status': 'invalid_format'
+                    })
+                    continue
+                
+                food_name = str(meal_item['food'])
+                try:
+                    quantity = float(meal_item['quantity'])
+                except (ValueError, TypeError):
+                    quantity = 0
+                if not math.isfinite(quantity) or not 0 < quantity <= MAX_ITEM_QUANTITY:
+                    meal_result['items'].append({'food': food_name, 'status': 'invalid_quantity'})
+                    continue
+                
+                food_name_lower = food_name.lower().strip()
+                if food_name_lower not in resolved_names:
+                    row, status, matched_food = catalog.position_lookup.get(food_name_lower), 'database', None
+                    if row is None:
+                        fuzzy_food, _ = fuzzy_match_food(catalog, food_name)
+                        if fuzzy_food:
+                            row, matched_food = catalog.position_lookup[fuzzy_food['name'].lower()], fuzzy_food['name']
+                    if row is None:
+                        # Batch scoring never calls OpenAI; reuse estimates already in the AI cache
+                        cached_entry = ai_nutrition_cache.get(food_name_lower)
+                        if cached_entry:
+                            nutrition = cached_entry['data']
+                            row, status = catalog_size + len(extra_gi), 'ai_estimated'
+                            extra_gi.append(float(nutrition['gi']))
+                            extra_net_carbs.append(float(nutrition['carbs_per_unit']) - float(nutrition['fiber_per_unit']))
+                            extra_grams.append(float(nutrition.get('grams_per_unit') or 0))
+                    resolved_names[food_name_lower] = (row, status, matched_food)
+                
+                row, status, matched_food = resolved_names[food_name_lower]
+                item_result = {'food': food_name, 'quantity': quantity}
+                if row is None:
+                    item_result['status'] = 'not_found'
+                else:
+                    item_result['source' if status == 'database' else 'status'] = status
+                    if matched_food:
+                        item_result['matched_food'] = matched_food
+                    meal_indexes.append(meal_index)
+                    rows.append(row)
+                    quantities.append(quantity)
+                    item_refs.append(item_result)
+                meal_result['items'].append(item_result)
+        
+        # One vectorized pass: per-item GL and grams, then per-meal totals
+        gi = np.concatenate([catalog.columns['gi'], np.array(extra_gi, dtype=np.float64)])
+        net_carbs = np.concatenate([catalog.columns['net_carbs'], np.array(extra_net_carbs, dtype=np.float64)])
+        grams_per_unit = np.concatenate([catalog.columns['grams_per_unit'], np.array(extra_grams, dtype=np.float64)])
+        
+        rows = np.array(rows, dtype=np.int64)
+        quantities = np.array(quantities, dtype=np.float64)
+        # Quantities are bounded, but a bad cached estimate must not turn the response into NaN/Infinity
+        item_gl = np.nan_to_num(np.round(gi[rows] * net_carbs[rows] / 100 * quantities, 2), nan=0.0, posinf=0.0, neginf=0.0)
+        item_grams = np.nan_to_num(np.round(grams_per_unit[rows] * quantities), nan=0.0, posinf=0.0, neginf=0.0)
+        meal_totals = np.round(np.bincount(np.array(meal_indexes, dtype=np.int64), weights=item_gl, minlength=len(meals)), 2)
+        
+        for item_result, gl, grams in zip(item_refs, item_gl.tolist(), item_grams.tolist()):
+            item_result['gl'] = gl
+            if grams:
+                item_result['grams'] = int(grams)
+        for meal_result, total_gl in zip(meal_results, meal_totals.tolist()):
+            meal_result['total_gl'] = total_gl
+        
+        return jsonify({
+            'total_meals': len(meal_results),
+            'total_items': len(item_refs),
+            'meals': meal_results,
             'usage': {
                 'used_today': request.usage_count,
                 'daily_limit': DAILY_MEAL_LIMIT,
                 'remaining': DAILY_MEAL_LIMIT - request.usage_count
             }
-        }
-        
-        return jsonify(response)
+        })
     
     except Exception as e:
-        app.logger.error(f"Unexpected error in calculate_gl: {e}")
+        app.logger.error(f"Unexpected error in calculate_gl_batch: {e}")
         return jsonify({
             'error': 'Internal server error',
             'message': 'An unexpected error occurred while processing your request'
@@ -1041,12 +2975,6 @@ def calculate_gl():
 def parse_meal_chat():
     """Parse meal description using OpenAI GPT-4 (PROTECTED - per-minute limit only, no daily count)"""
     try:
-        if not openai_client:
-            return jsonify({
-                'status': 'error',
-                'message': 'OpenAI API key not configured'
-            }), 500
-        
         if not request.is_json:
             return jsonify({
                 'error': 'Request must be JSON',
@@ -1069,7 +2997,23 @@ def parse_meal_chat():
                 'message': 'Meal text must be a non-empty string'
             }), 400
         
-        system_prompt = """Parse meal descriptions into structured JSON format.
+        # Repeated meal texts are served from the parse cache
+        catalog = food_catalog
+        cache_key = parse_cache_key('chat', meal_text, catalog)
+        meal_array = get_cached_parse_result(cache_key)
+        
+        if meal_array is None:
+            # Fast path: catalog foods are parsed locally, only the leftover spans go to GPT
+            meal_array, unresolved_spans = parse_meal_locally(catalog, meal_text, require_catalog_food=True)
+            
+            if unresolved_spans:
+                if not openai_client:
+                    return jsonify({
+                        'status': 'error',
+                        'message': 'OpenAI API key not configured'
+                    }), 500
+            
+                system_prompt = """Parse meal descriptions into structured JSON format.
 
 Return JSON with "meal" key containing array of objects with "food" and "quantity" keys.
 Examples:
@@ -1077,59 +3021,27 @@ Examples:
 "rice and dal" → {"meal": [{"food": "White Rice", "quantity": 1}, {"food": "Dal", "quantity": 1}]}
 
 Important: Always return a JSON object with a "meal" key containing an array of food items."""
-        
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Parse this meal: {meal_text}"}
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=500,
-            temperature=0.3
-        )
-        
-        gpt_response = response.choices[0].message.content
-        
-        try:
-            if not gpt_response:
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Could not parse meal'
-                }), 400
-            parsed_response = json.loads(gpt_response)
             
-            if isinstance(parsed_response, dict) and 'meal' in parsed_response:
-                meal_array = parsed_response['meal']
-            elif isinstance(parsed_response, list):
-                meal_array = parsed_response
+                gpt_meal_array = call_gpt_meal_parser(system_prompt, ', '.join(unresolved_spans))
+                if gpt_meal_array is None:
+                    return jsonify({
+                        'status': 'error',
+                        'message': 'Could not parse meal'
+                    }), 400
+                meal_array = fill_unresolved_slots(meal_array, unresolved_spans, gpt_meal_array)
             else:
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Could not parse meal'
-                }), 400
-            
-            if not isinstance(meal_array, list):
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Could not parse meal'
-                }), 400
+                app.logger.info(f"Parsed meal locally without GPT: {meal_text!r}")
             
-            return jsonify({
-                'meal': meal_array,
-                'usage': {
-                    'used_today': request.usage_count,
-                    'daily_limit': DAILY_MEAL_LIMIT,
-                    'remaining': DAILY_MEAL_LIMIT - request.usage_count
-                }
-            })
+            store_parse_result(cache_key, meal_array, catalog.version)
         
-        except json.JSONDecodeError:
-            app.logger.error(f"Failed to parse GPT JSON response: {gpt_response}")
-            return jsonify({
-                'status': 'error',
-                'message': 'Could not parse meal'
-            }), 400
+        return jsonify({
+            'meal': meal_array,
+            'usage': {
+                'used_today': request.usage_count,
+                'daily_limit': DAILY_MEAL_LIMIT,
+                'remaining': DAILY_MEAL_LIMIT - request.usage_count
+            }
+        })
     
     except Exception as e:
         app.logger.error(f"Unexpected error in parse_meal_chat: {e}")
@@ -1139,30 +3051,34 @@ Important: Always return a JSON object with a "meal" key containing an array of
         }), 500
 
 
+GRAMS_PATTERN = re.compile(r'(\d+)\s*g')
+SIZE_DEFAULT_GRAMS = {
+    'small': 100,
+    'medium': 150,
+    'large': 200,
+}
+
+
 def extract_grams_from_unit_desc(unit_desc):
     """Extract grams from unit description like '25g', '150g cooked', 'Medium Size'"""
-    import re
-    match = re.search(r'(\d+)\s*g', unit_desc.lower())
+    unit_desc_lower = unit_desc.lower()
+    match = GRAMS_PATTERN.search(unit_desc_lower)
     if match:
         return int(match.group(1))
-    size_defaults = {
-        'small': 100,
-        'medium': 150,
-        'large': 200,
-    }
-    for size, grams in size_defaults.items():
-        if size in unit_desc.lower():
+    for size, grams in SIZE_DEFAULT_GRAMS.items():
+        if size in unit_desc_lower:
             return grams
     return 100
 
 
 def get_ai_food_estimation(food_name):
     """Get AI estimation for unknown food with nutrition and portion info"""
-    if not openai_client:
-        return None
-    
-    try:
-        prompt = f"""For the Indian food item "{food_name}", provide nutrition estimation in JSON format:
+    return single_flight(('estimation', food_name.lower().strip()), fetch_ai_food_estimation, food_name)
+
+
+def fetch_ai_food_estimation(food_name):
+    """Call OpenAI for a food's nutrition and portion estimation (None if unavailable)"""
+    prompt = f"""For the Indian food item "{food_name}", provide nutrition estimation in JSON format:
 {{
     "name": "proper food name",
     "gi": estimated glycemic index (number 0-100),
@@ -1173,23 +3089,281 @@ def get_ai_food_estimation(food_name):
     "fiber_per_unit": fiber in grams per serving (number)
 }}
 Use typical Indian portion sizes. Be conservative with estimates."""
+    
+    return request_ai_json(
+        'estimate',
+        "You are a nutrition expert specializing in Indian cuisine. Return only valid JSON.",
+        prompt,
+        max_tokens=200
+    )
+
+
+def iter_ai_lookups(lookup_fn, food_names, deadline_seconds=AI_LOOKUP_DEADLINE_SECONDS):
+    """Run an AI lookup for several foods in parallel, yielding (food_name, result) as each finishes.
+
+    Lookups that fail or are still running when the deadline passes yield None,
+    so callers can return partial results instead of waiting on a stalled call.
+    """
+    unique_names = list(dict.fromkeys(food_names))
+    if not unique_names:
+        return
+
+    futures = {ai_lookup_executor.submit(lookup_fn, name): name for name in unique_names}
+    pending = set(futures)
+
+    try:
+        for future in as_completed(futures, timeout=deadline_seconds):
+            pending.discard(future)
+            food_name = futures[future]
+            try:
+                yield food_name, future.result()
+            except Exception as e:
+                app.logger.error(f"AI lookup failed for {food_name}: {e}")
+                yield food_name, None
+    except TimeoutError:
+        for future in pending:
+            future.cancel()
+            food_name = futures[future]
+            app.logger.warning(f"AI lookup for '{food_name}' exceeded {deadline_seconds}s deadline, skipping")
+            yield food_name, None
+
+
+def run_ai_lookups_concurrently(lookup_fn, food_names, deadline_seconds=AI_LOOKUP_DEADLINE_SECONDS):
+    """Run an AI lookup for several foods in parallel, returning {food_name: result} (None for failures)"""
+    return dict(iter_ai_lookups(lookup_fn, food_names, deadline_seconds))
+
+
+SMART_PARSE_SYSTEM_PROMPT = """Parse meal descriptions into structured JSON format.
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a nutrition expert specializing in Indian cuisine. Return only valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=200,
-            temperature=0.3
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-        return result
-    except Exception as e:
-        app.logger.error(f"AI estimation failed for {food_name}: {e}")
+Extract food items and their quantities from the input text.
+Use common food names without specific mapping - just extract what the user mentioned.
+
+Return JSON with "meal" key containing array of objects with "food" and "quantity" keys.
+The quantity should be a number (default to 1 if not specified).
+
+Important: Always return a JSON object with a "meal" key containing an array of food items."""
+
+
+SMART_PARSE_FUSED_SYSTEM_PROMPT = """Parse meal descriptions into structured JSON format, and estimate nutrition for foods that are not in the catalog.
+
+Extract food items and their quantities from the input text.
+Use common food names without specific mapping - just extract what the user mentioned.
+
+Catalog foods: {catalog_names}
+
+Return JSON with "meal" key containing array of objects with keys:
+- "food": the food as the user mentioned it
+- "quantity": a number (default to 1 if not specified)
+- "catalog_food": the catalog food name if the item is one of the catalog foods, otherwise null
+- "estimate": null for catalog foods, otherwise an object with keys name (proper food name), gi (estimated glycemic index 0-100), unit (typical serving unit like bowl, piece, cup), unit_desc (description with grams, e.g. "1 medium bowl = 150g"), grams_per_unit, carbs_per_unit and fiber_per_unit (grams per serving)
+
+Use typical Indian portion sizes. Be conservative with estimates.
+
+Important: Always return a JSON object with a "meal" key containing an array of food items."""
+
+
+def fused_catalog_candidates(catalog, unresolved_spans):
+    """Catalog names the unresolved spans might mean, best first, at most SMART_PARSE_FUSED_MAX_CANDIDATES.
+    
+    Per span: foods containing the whole name, then foods with a name word inside it,
+    then foods containing any of its words. Tiers are merged across spans so one
+    vague span can't crowd out the others.
+    """
+    tiers = [[], [], []]
+    for span in unresolved_spans:
+        _, words = split_meal_span(catalog, span.lower())
+        food_name = " ".join(words)
+        if not re.search(r"[a-z]", food_name):
+            continue
+        
+        word_positions = set()
+        for word in words:
+            if len(word) > 2:
+                word_positions |= find_foods_containing(catalog, word)
+        tiers[0].extend(sorted(find_foods_containing(catalog, food_name)))
+        tiers[1].extend(sorted(find_foods_with_word_in(catalog, food_name)))
+        tiers[2].extend(sorted(word_positions))
+    
+    positions = list(dict.fromkeys(position for tier in tiers for position in tier))
+    return [catalog.records[position].name for position in positions[:SMART_PARSE_FUSED_MAX_CANDIDATES]]
+
+
+def call_gpt_fused_meal_parser(catalog, unresolved_spans):
+    """Parse the unresolved meal spans and estimate their non-catalog foods in one GPT call.
+    
+    Returns (meal_array, ai_estimates), or None if the call or reply is unusable.
+    The prompt lists only candidate catalog names for these spans. Items GPT marks as
+    catalog foods are renamed to the catalog name only when the catalog really has
+    that food; ai_estimates maps food names to estimates.
+    """
+    catalog_names = fused_catalog_candidates(catalog, unresolved_spans)
+    system_prompt = SMART_PARSE_FUSED_SYSTEM_PROMPT.replace('{catalog_names}', json.dumps(catalog_names))
+    parsed_response = request_ai_json(
+        'parse_estimate',
+        system_prompt,
+        f"Parse this meal: {', '.join(unresolved_spans)}",
+        max_tokens=SMART_PARSE_FUSED_MAX_TOKENS
+    )
+    if parsed_response is None:
+        return None
+    
+    parsed_items = parsed_response.get('meal')
+    if not isinstance(parsed_items, list):
+        app.logger.error(f"Unexpected AI parse_estimate response format: {parsed_response}")
         return None
+    
+    meal_array = []
+    ai_estimates = {}
+    for parsed_item in parsed_items:
+        if not isinstance(parsed_item, dict) or not isinstance(parsed_item.get('food'), str):
+            continue
+        
+        food_name = parsed_item['food'].strip()
+        catalog_food = catalog.lookup.get(str(parsed_item.get('catalog_food') or '').lower().strip())
+        estimate = parsed_item.get('estimate')
+        
+        if catalog_food:
+            food_name = catalog_food['name']
+        elif isinstance(estimate, dict):
+            ai_estimates[food_name] = estimate
+        
+        if food_name:
+            meal_array.append({'food': food_name, 'quantity': parsed_item.get('quantity', 1)})
+    
+    return meal_array, ai_estimates
+
+
+def parse_smart_meal_text(catalog, meal_text, degraded=False):
+    """Split meal text into [{'food', 'quantity'}] for /parse-meal-smart.
+    
+    Returns (meal_array, ai_estimates, error). ai_estimates holds the estimates the
+    fused GPT call already made, by food name; other non-catalog foods still need one.
+    """
+    fused = SMART_PARSE_FUSED and not degraded
+    ai_estimates = {}
+    
+    # Fast path: spans made of catalog words are parsed locally, only the rest go to GPT.
+    # Fused mode keeps only real catalog foods local; GPT parses and estimates everything else at once
+    meal_array, unresolved_spans = parse_meal_locally(catalog, meal_text, require_catalog_food=fused)
+    
+    if unresolved_spans and degraded:
+        # No GPT: keep each unresolved span as a food name for catalog matching on /review
+        spans = iter(unresolved_spans)
+        parsed_items = []
+        for item in meal_array:
+            if item is None:
+                quantity, words = extract_quantity(next(spans))
+                food_name = " ".join(words).strip()
+                if not food_name:
+                    continue
+                item = {'food': food_name, 'quantity': format_quantity(quantity)}
+            parsed_items.append(item)
+        meal_array = parsed_items
+    elif unresolved_spans:
+        if not openai_client:
+            return None, None, ('OpenAI API key not configured', 500)
+        
+        if fused:
+            fused_result = call_gpt_fused_meal_parser(catalog, unresolved_spans)
+            if fused_result is None:
+                return None, None, ('Could not parse meal', 400)
+            gpt_meal_array, ai_estimates = fused_result
+        else:
+            gpt_meal_array = call_gpt_meal_parser(SMART_PARSE_SYSTEM_PROMPT, ', '.join(unresolved_spans))
+            if gpt_meal_array is None:
+                return None, None, ('Could not parse meal', 400)
+        meal_array = fill_unresolved_slots(meal_array, unresolved_spans, gpt_meal_array)
+    else:
+        app.logger.info(f"Parsed meal locally without GPT: {meal_text!r}")
+    
+    if not meal_array or len(meal_array) == 0:
+        return None, None, ('No food items found in your description', 400)
+    
+    return meal_array, ai_estimates, None
+
+
+def match_smart_meal_items(catalog, meal_array):
+    """Match parsed items against the catalog, returning [(item, db_matches, exact_match)]"""
+    matched_items = []
+    
+    for item in meal_array:
+        food_name = item.get('food', '').lower()
+        
+        if not food_name:
+            continue
+        
+        db_matches = []
+        exact_match = None
+        
+        # Candidates come from the indexes instead of a scan over the whole catalog:
+        # foods containing the full name or any of its words, or whose words appear in it
+        food_words = [w for w in food_name.split() if len(w) > 2]
+        substring_positions = find_foods_containing(catalog, food_name)
+        candidate_positions = substring_positions | find_foods_with_word_in(catalog, food_name)
+        for word in food_words:
+            candidate_positions |= find_foods_containing(catalog, word)
+        
+        for position in sorted(candidate_positions):
+            match_data = catalog.records[position].match_payload
+            
+            if position in substring_positions and food_name == catalog.names_lower[position]:
+                exact_match = match_data
+            db_matches.append(match_data)
+        
+        if not exact_match:
+            # Misspellings of curated foods ("jowar rotti") resolve without an AI estimate
+            fuzzy_food, _ = fuzzy_match_food(catalog, food_name)
+            if fuzzy_food:
+                exact_match = fuzzy_food.match_payload
+                db_matches = [exact_match] + [m for m in db_matches if m['name'] != fuzzy_food['name']]
+        
+        matched_items.append((item, db_matches, exact_match))
+    
+    return matched_items
+
+
+def build_smart_result_item(item_id, item, db_matches, exact_match, ai_data):
+    """Build one /parse-meal-smart result item from its catalog matches and AI estimate (if any)"""
+    ai_option = None
+    if not exact_match and ai_data:
+        ai_option = {
+            'name': ai_data.get('name', item['food']),
+            'gi': ai_data.get('gi', 50),
+            'unit': ai_data.get('unit', 'serving'),
+            'unit_desc': ai_data.get('unit_desc', '1 serving = 150g'),
+            'grams_per_unit': ai_data.get('grams_per_unit', 150),
+            'carbs_per_unit': ai_data.get('carbs_per_unit', 30),
+            'fiber_per_unit': ai_data.get('fiber_per_unit', 2),
+            'source': 'ai_estimated'
+        }
+        ai_option['nutrition_token'] = generate_nutrition_token(ai_option)
+    
+    if exact_match:
+        match_type = 'exact_match'
+        selected = exact_match
+    elif ai_option:
+        match_type = 'multiple_options'
+        selected = None
+    elif len(db_matches) == 1:
+        match_type = 'exact_match'
+        selected = db_matches[0]
+    elif len(db_matches) > 1:
+        match_type = 'multiple_options'
+        selected = None
+    else:
+        match_type = 'unknown'
+        selected = None
+    
+    return {
+        'id': item_id,
+        'original_name': item['food'],
+        'quantity': item.get('quantity', 1),
+        'match_type': match_type,
+        'db_options': db_matches[:5],
+        'ai_option': ai_option,
+        'selected': selected,
+        'confirmed': match_type == 'exact_match'
+    }
 
 
 @app.route('/parse-meal-smart', methods=['POST'])
@@ -1197,12 +3371,6 @@ Use typical Indian portion sizes. Be conservative with estimates."""
 def parse_meal_smart():
     """Smart meal parsing with database disambiguation (PROTECTED - per-minute limit only, no daily count)"""
     try:
-        if not openai_client:
-            return jsonify({
-                'status': 'error',
-                'message': 'OpenAI API key not configured'
-            }), 500
-        
         if not request.is_json:
             return jsonify({
                 'error': 'Request must be JSON',
@@ -1225,143 +3393,56 @@ def parse_meal_smart():
                 'message': 'Meal text must be a non-empty string'
             }), 400
         
-        system_prompt = """Parse meal descriptions into structured JSON format.
-        
-Extract food items and their quantities from the input text.
-Use common food names without specific mapping - just extract what the user mentioned.
-
-Return JSON with "meal" key containing array of objects with "food" and "quantity" keys.
-The quantity should be a number (default to 1 if not specified).
-
-Important: Always return a JSON object with a "meal" key containing an array of food items."""
-        
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Parse this meal: {meal_text}"}
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=500,
-            temperature=0.3
-        )
-        
-        gpt_response = response.choices[0].message.content
-        if not gpt_response:
+        # Repeated meal texts are served from the parse cache
+        catalog = food_catalog
+        cache_key = parse_cache_key('smart', meal_text, catalog)
+        cached_items = get_cached_parse_result(cache_key)
+        if cached_items is not None:
             return jsonify({
-                'status': 'error',
-                'message': 'Could not parse meal'
-            }), 400
-        parsed_response = json.loads(gpt_response)
+                'status': 'success',
+                'items': cached_items,
+                'total_items': len(cached_items),
+                'usage': {
+                    'used_today': request.usage_count,
+                    'daily_limit': DAILY_MEAL_LIMIT,
+                    'remaining': DAILY_MEAL_LIMIT - request.usage_count
+                }
+            })
         
-        if 'meal' not in parsed_response:
+        degraded = ai_degraded()
+        meal_array, ai_estimates, parse_error = parse_smart_meal_text(catalog, meal_text, degraded)
+        if parse_error:
+            message, status_code = parse_error
             return jsonify({
                 'status': 'error',
-                'message': 'Could not parse meal'
-            }), 400
+                'message': message
+            }), status_code
         
-        meal_array = parsed_response['meal']
+        # First pass: match every item against the database
+        matched_items = match_smart_meal_items(catalog, meal_array)
         
-        if not meal_array or len(meal_array) == 0:
-            return jsonify({
-                'status': 'error',
-                'message': 'No food items found in your description'
-            }), 400
+        # Estimate every item without an exact match in parallel (database matches only while degraded),
+        # unless the fused parse already did
+        pending_names = [item['food'] for item, _, exact_match in matched_items if not exact_match]
+        ai_results = {} if degraded else run_ai_lookups_concurrently(
+            get_ai_food_estimation, [name for name in pending_names if name not in ai_estimates]
+        )
+        ai_results.update(ai_estimates)
         
-        result_items = []
+        result_items = [
+            build_smart_result_item(item_id, item, db_matches, exact_match, ai_results.get(item['food']))
+            for item_id, (item, db_matches, exact_match) in enumerate(matched_items)
+        ]
         
-        for item in meal_array:
-            food_name = item.get('food', '').lower()
-            quantity = item.get('quantity', 1)
-            
-            if not food_name:
-                continue
-            
-            db_matches = []
-            exact_match = None
-            
-            for db_food in food_database:
-                db_name_lower = db_food['name'].lower()
-                food_words = [w for w in food_name.split() if len(w) > 2]
-                db_words = [w for w in db_name_lower.split() if len(w) > 2]
-                
-                if food_name == db_name_lower or food_name in db_name_lower:
-                    grams = extract_grams_from_unit_desc(db_food['unit_desc'])
-                    match_data = {
-                        'name': db_food['name'],
-                        'category': db_food['category'],
-                        'gi': db_food['gi'],
-                        'unit': db_food['unit'],
-                        'unit_desc': db_food['unit_desc'],
-                        'grams_per_unit': grams,
-                        'carbs_per_unit': db_food['carbs_per_unit'],
-                        'fiber_per_unit': db_food['fiber_per_unit'],
-                        'source': 'database'
-                    }
-                    
-                    if food_name == db_name_lower:
-                        exact_match = match_data
-                    db_matches.append(match_data)
-                elif any(word in db_name_lower for word in food_words) or any(db_word in food_name for db_word in db_words):
-                    grams = extract_grams_from_unit_desc(db_food['unit_desc'])
-                    db_matches.append({
-                        'name': db_food['name'],
-                        'category': db_food['category'],
-                        'gi': db_food['gi'],
-                        'unit': db_food['unit'],
-                        'unit_desc': db_food['unit_desc'],
-                        'grams_per_unit': grams,
-                        'carbs_per_unit': db_food['carbs_per_unit'],
-                        'fiber_per_unit': db_food['fiber_per_unit'],
-                        'source': 'database'
-                    })
-            
-            ai_option = None
-            if not exact_match:
-                ai_data = get_ai_food_estimation(item['food'])
-                if ai_data:
-                    ai_option = {
-                        'name': ai_data.get('name', item['food']),
-                        'gi': ai_data.get('gi', 50),
-                        'unit': ai_data.get('unit', 'serving'),
-                        'unit_desc': ai_data.get('unit_desc', '1 serving = 150g'),
-                        'grams_per_unit': ai_data.get('grams_per_unit', 150),
-                        'carbs_per_unit': ai_data.get('carbs_per_unit', 30),
-                        'fiber_per_unit': ai_data.get('fiber_per_unit', 2),
-                        'source': 'ai_estimated'
-                    }
-            
-            if exact_match:
-                match_type = 'exact_match'
-                selected = exact_match
-            elif ai_option:
-                match_type = 'multiple_options'
-                selected = None
-            elif len(db_matches) == 1:
-                match_type = 'exact_match'
-                selected = db_matches[0]
-            elif len(db_matches) > 1:
-                match_type = 'multiple_options'
-                selected = None
-            else:
-                match_type = 'unknown'
-                selected = None
-            
-            result_items.append({
-                'id': len(result_items),
-                'original_name': item['food'],
-                'quantity': quantity,
-                'match_type': match_type,
-                'db_options': db_matches[:5],
-                'ai_option': ai_option,
-                'selected': selected,
-                'confirmed': match_type == 'exact_match'
-            })
+        # Don't pin partial results (failed, timed-out or skipped AI estimations) in the cache
+        if all(ai_results.get(name) for name in pending_names):
+            store_parse_result(cache_key, result_items, catalog.version)
         
         return jsonify({
             'status': 'success',
             'items': result_items,
             'total_items': len(result_items),
+            'degraded': degraded,
             'usage': {
                 'used_today': request.usage_count,
                 'daily_limit': DAILY_MEAL_LIMIT,
@@ -1377,6 +3458,115 @@ Important: Always return a JSON object with a "meal" key containing an array of
         }), 500
 
 
+def ndjson_event(event):
+    return json.dumps(event) + '\n'
+
+
+@app.route('/parse-meal-smart/stream', methods=['POST'])
+@require_auth_with_minute_limit
+def parse_meal_smart_stream():
+    """Streaming /parse-meal-smart: NDJSON events as items resolve (PROTECTED - per-minute limit only, no daily count)"""
+    try:
+        if not request.is_json:
+            return jsonify({
+                'error': 'Request must be JSON',
+                'message': 'Content-Type must be application/json'
+            }), 400
+        
+        data = request.get_json()
+        
+        if not data or 'text' not in data:
+            return jsonify({
+                'error': 'Invalid request format',
+                'message': 'Request must contain "text" field'
+            }), 400
+        
+        meal_text = data['text']
+        
+        if not meal_text or not isinstance(meal_text, str):
+            return jsonify({
+                'error': 'Invalid meal text',
+                'message': 'Meal text must be a non-empty string'
+            }), 400
+        
+        usage = {
+            'used_today': request.usage_count,
+            'daily_limit': DAILY_MEAL_LIMIT,
+            'remaining': DAILY_MEAL_LIMIT - request.usage_count
+        }
+        
+        catalog = food_catalog
+        cache_key = parse_cache_key('smart', meal_text, catalog)
+        cached_items = get_cached_parse_result(cache_key)
+        degraded = False
+        
+        if cached_items is not None:
+            matched_items, result_items = [], cached_items
+        else:
+            # Parse errors happen before the stream starts, so they keep their HTTP status
+            degraded = ai_degraded()
+            meal_array, ai_estimates, parse_error = parse_smart_meal_text(catalog, meal_text, degraded)
+            if parse_error:
+                message, status_code = parse_error
+                return jsonify({
+                    'status': 'error',
+                    'message': message
+                }), status_code
+            
+            matched_items = match_smart_meal_items(catalog, meal_array)
+            result_items = []
+            for item_id, (item, db_matches, exact_match) in enumerate(matched_items):
+                ai_data = ai_estimates.get(item['food'])
+                result_item = build_smart_result_item(item_id, item, db_matches, exact_match, ai_data)
+                result_item['pending'] = not exact_match and not degraded and not ai_data
+                result_items.append(result_item)
+        
+        def generate():
+            # Catalog matches first: the review page can render them before any AI call returns
+            yield ndjson_event({
+                'type': 'items',
+                'status': 'success',
+                'items': result_items,
+                'total_items': len(result_items),
+                'degraded': degraded,
+                'usage': usage
+            })
+            
+            pending_names = [] if degraded else [
+                result_item['original_name'] for result_item in result_items if result_item.get('pending')
+            ]
+            all_resolved = not degraded or all(exact_match for _, _, exact_match in matched_items)
+            
+            try:
+                for food_name, ai_data in iter_ai_lookups(get_ai_food_estimation, pending_names):
+                    all_resolved = all_resolved and bool(ai_data)
+                    for item_id, (item, db_matches, exact_match) in enumerate(matched_items):
+                        if item['food'] == food_name and not exact_match:
+                            result_items[item_id] = build_smart_result_item(item_id, item, db_matches, exact_match, ai_data)
+                            yield ndjson_event({'type': 'item', 'item': result_items[item_id]})
+                
+                if matched_items and all_resolved:
+                    store_parse_result(cache_key, result_items, catalog.version)
+                
+                yield ndjson_event({'type': 'done', 'total_items': len(result_items)})
+            except Exception as e:
+                app.logger.error(f"Unexpected error streaming parse_meal_smart: {e}")
+                yield ndjson_event({'type': 'error', 'message': 'Could not parse meal'})
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        
+    except Exception as e:
+        app.logger.error(f"Unexpected error in parse_meal_smart_stream: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': 'Could not parse meal'
+        }), 500
+
+
 @app.route('/portion-info', methods=['POST'])
 @require_auth
 def portion_info():
@@ -1405,9 +3595,10 @@ def portion_info():
             }), 400
         
         food_name_lower = food_name.lower()
+        catalog = food_catalog
         
-        if food_name_lower in food_lookup:
-            food_item = food_lookup[food_name_lower]
+        if food_name_lower in catalog.lookup:
+            food_item = catalog.lookup[food_name_lower]
             
             response = {
                 'food': food_name,
@@ -1418,7 +3609,7 @@ def portion_info():
             
             return jsonify(response)
         else:
-            similar_foods = find_similar_food_portions(food_name)
+            similar_foods = find_similar_food_portions(catalog, food_name)
             
             if similar_foods:
                 unit_desc = similar_foods[0]['unit_desc']
@@ -1495,29 +3686,108 @@ def results_page():
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint (PUBLIC)"""
+    catalog = food_catalog
     return jsonify({
         'status': 'healthy',
-        'database_loaded': len(food_database) > 0,
-        'total_foods': len(food_database)
+        'database_loaded': len(catalog.foods) > 0,
+        'total_foods': len(catalog.foods),
+        'catalog_version': catalog.version,
+        'catalog_loaded_at': catalog.loaded_at.isoformat(),
+        'parse_cache': parse_result_cache.stats(),
+        'suggestions_cache': suggestions_cache.stats(),
+        'auth_user_cache': auth_user_cache.stats(),
+        'ai_gateway': ai_circuit_breaker.snapshot()
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint (requires METRICS_TOKEN unless METRICS_PUBLIC)"""
+    if not METRICS_PUBLIC:
+        if not METRICS_TOKEN:
+            return jsonify({'error': 'Not found', 'message': 'Metrics endpoint is disabled (set METRICS_TOKEN)'}), 404
+        
+        auth_header = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(auth_header, f'Bearer {METRICS_TOKEN}'):
+            return jsonify({'error': 'Unauthorized', 'message': 'Invalid metrics token'}), 401
+    
+    # The rate limiter key gauge is the sweeper's last value, not a fresh count per scrape
+    update_metric_gauges(include_rate_limiter=False)
+    return Response(render_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+
 @app.route('/foods', methods=['GET'])
 def list_foods():
     """List all available foods (PUBLIC)"""
+    catalog = food_catalog
     return jsonify({
-        'total_foods': len(food_database),
-        'foods': [{'name': item['name'], 'category': item['category']} for item in food_database]
+        'total_foods': len(catalog.foods),
+        'foods': [{'name': item['name'], 'category': item['category']} for item in catalog.foods]
     })
 
 
+# ============================================
+# ADMIN ENDPOINTS (require ADMIN_TOKEN)
+# ============================================
+
+@app.route('/admin/catalog/reload', methods=['POST'])
+def reload_catalog():
+    """Reload the food catalog file now and signal every other worker to reload (ADMIN)"""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Not found', 'message': 'Admin endpoints are disabled (set ADMIN_TOKEN)'}), 404
+    
+    auth_header = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(auth_header, f'Bearer {ADMIN_TOKEN}'):
+        return jsonify({'error': 'Unauthorized', 'message': 'Invalid admin token'}), 401
+    
+    previous_version = food_catalog.version
+    try:
+        published = load_food_database(force=True)
+    except CatalogLoadError as e:
+        # Nothing is published: other workers keep serving the current catalog
+        return jsonify({
+            'status': 'error',
+            'message': f'Could not load catalog file: {e}',
+            'catalog_version': previous_version
+        }), 500
+    
+    try:
+        catalog = food_catalog
+        generation = publish_catalog_reload(catalog.version)
+        
+        app.logger.info(f"Catalog reload requested: {previous_version} -> {catalog.version} (generation {generation})")
+        return jsonify({
+            'status': 'success',
+            'changed': published,
+            'previous_version': previous_version,
+            'catalog_version': catalog.version,
+            'total_foods': len(catalog.foods),
+            'generation': generation
+        })
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error reloading catalog: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': 'Could not reload catalog'
+        }), 500
+
+
 # ============================================
 # DATABASE INITIALIZATION
 # ============================================
 
 with app.app_context():
     db.create_all()
-    load_food_database()
+    ensure_parse_cache_schema()
+    try:
+        load_food_database()
+    except CatalogLoadError:
+        pass  # Logged; serve the empty catalog until the file is fixed
+    warm_ai_nutrition_cache()
+
+start_rate_limit_sweeper()
+start_catalog_watcher()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,388 @@
+"""End-to-end benchmark: real gunicorn workers, fake OpenAI, full user flows.
+
+Starts benchmarks/fake_openai.py and the app under gunicorn (using
+gunicorn.conf.py, so gevent workers and multiprocess metrics as in
+production), then runs --flows user flows, --concurrency at a time:
+
+    register -> login -> /parse-meal-smart -> /calculate-gl -> /portion-info
+
+Each flow is a new user (with its own X-Forwarded-For address so the
+per-IP registration limit doesn't kick in), so the per-user daily and
+per-minute limits are never hit. Meals are drawn from a fixed list with a
+seeded RNG and mix catalog foods with foods only the (fake) AI knows.
+
+Reports throughput, p50/p95/p99 latency and DB queries per request for
+every step (the query counts come from the app's /metrics). --save writes
+the results as JSON; --baseline compares a run against a saved file and
+exits non-zero when p95 latency or throughput regress by more than
+--tolerance.
+
+Usage:
+    python benchmarks/e2e.py [--flows 200] [--concurrency 20] [--workers 2]
+        [--latency 0.8] [--jitter 0.4] [--database-url postgresql://localhost/gicalc_bench]
+        [--save baseline.json] [--baseline baseline.json]
+
+The default database is a fresh SQLite file in a temp directory. Baselines
+are only comparable on the same machine with the same options. Errors are
+broken down by HTTP status: 503s on register/login are the password pool
+shedding load, not failures.
+"""
+import argparse
+import json
+import os
+import random
+import runpy
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+METRICS_TOKEN = "benchmark-metrics"  # /metrics is disabled without a token
+STEPS = ["register", "login", "parse_meal_smart", "calculate_gl", "portion_info"]
+
+MEALS = [
+    "2 roti and dal",
+    "1 bowl white rice, dal fry and curd",
+    "3 idli with sambar",
+    "masala dosa and coconut chutney",
+    "2 chapathi, paneer butter masala",
+    "1 bowl biryani and raita",
+    "poha and tea",
+    "2 pooris and chole",
+    "upma, 1 banana",
+    "1 bowl kheer",
+    "rasmalai and gulab jamun",
+    "1 plate pav bhaji",
+    "jowar roti, palak dal and salad",
+    "1 bowl khichdi with papad",
+    "3 dhokla and green chutney",
+]
+
+
+# ============================================
+# SERVER PROCESSES
+# ============================================
+
+def serve(bind, workers):
+    """Run the app under gunicorn with the repo's gunicorn.conf.py (benchmark child process)"""
+    from gunicorn.app.base import BaseApplication
+
+    class BenchmarkApplication(BaseApplication):
+        def load_config(self):
+            settings = runpy.run_path(os.path.join(REPO_ROOT, "gunicorn.conf.py"))
+            for key, value in settings.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+            self.cfg.set("bind", bind)
+            self.cfg.set("workers", workers)
+            self.cfg.set("loglevel", "warning")
+
+        def load(self):
+            import logging
+            import email_validator
+
+            # Synthetic users have no MX records to check
+            email_validator.CHECK_DELIVERABILITY = False
+            from app import app
+
+            logging.disable(logging.INFO)
+            return app
+
+    BenchmarkApplication().run()
+
+
+def wait_for(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=5):
+                return
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            time.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def port_in_use(port):
+    with socket.socket() as sock:
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+
+def start_processes(args, workdir):
+    """Start the fake OpenAI server and gunicorn; returns (processes, app base URL)"""
+    for port in (args.port, args.openai_port):
+        if port_in_use(port):
+            raise RuntimeError(f"port {port} is already in use (a previous run still going?)")
+
+    env = dict(os.environ)
+    env.update({
+        "SESSION_SECRET": "benchmark-secret",
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "OPENAI_API_KEY": "sk-fake",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.openai_port}/v1",
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(workdir, "metrics"),
+        "METRICS_TOKEN": METRICS_TOKEN,
+    })
+    os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"])
+    log = open(os.path.join(workdir, "server.log"), "w")
+
+    fake_openai = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "benchmarks", "fake_openai.py"),
+         "--port", str(args.openai_port), "--latency", str(args.latency),
+         "--jitter", str(args.jitter), "--seed", str(args.seed)],
+        stdout=log, stderr=log
+    )
+    processes = [fake_openai]
+    try:
+        # Create the schema once, so workers booting together don't race on CREATE TABLE
+        subprocess.run([sys.executable, "-c", "import app"], cwd=REPO_ROOT, env=env, stdout=log, stderr=log, check=True)
+        processes.insert(0, subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(args.port), "--workers", str(args.workers)],
+            cwd=REPO_ROOT, env=env, stdout=log, stderr=log
+        ))
+
+        base_url = f"http://127.0.0.1:{args.port}"
+        wait_for(f"{base_url}/health")
+    except Exception:
+        stop_processes(processes)
+        raise
+    return processes, base_url
+
+
+def stop_processes(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# ============================================
+# LOAD GENERATION
+# ============================================
+
+class StepRecorder:
+    def __init__(self):
+        self.latencies = {step: [] for step in STEPS}
+        self.errors = {step: {} for step in STEPS}  # {step: {status: count}}
+        self.lock = threading.Lock()
+
+    def record(self, step, seconds, error=None):
+        with self.lock:
+            if error is None:
+                self.latencies[step].append(seconds)
+            else:
+                self.errors[step][error] = self.errors[step].get(error, 0) + 1
+
+
+def call(recorder, step, base_url, path, payload, token=None, headers=None):
+    """POST JSON and record the step's latency; returns the decoded body or None on failure"""
+    request_headers = {"Content-Type": "application/json"}
+    if token:
+        request_headers["Authorization"] = f"Bearer {token}"
+    request_headers.update(headers or {})
+    request = urllib.request.Request(base_url + path, data=json.dumps(payload).encode(), headers=request_headers)
+
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            body = json.loads(response.read())
+        recorder.record(step, time.perf_counter() - started)
+        return body
+    except urllib.error.HTTPError as e:
+        recorder.record(step, time.perf_counter() - started, str(e.code))
+    except (urllib.error.URLError, ConnectionError, TimeoutError, ValueError) as e:
+        recorder.record(step, time.perf_counter() - started, type(e).__name__)
+    return None
+
+
+def choose_food(item):
+    """Pick what the review page would send for an item: the selection, the AI estimate or the top match"""
+    option = item.get("selected") or item.get("ai_option") or (item.get("db_options") or [None])[0]
+    if not option:
+        return None
+    food = {"food": option["name"], "quantity": item.get("quantity", 1)}
+    if option.get("nutrition_token"):
+        food["nutrition_token"] = option["nutrition_token"]
+    return food
+
+
+def run_flow(recorder, base_url, run_id, index, meal_text):
+    email = f"bench-{run_id}-{index}@example.com"
+    headers = {"X-Forwarded-For": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"}
+    password = "benchmark-password"
+
+    registered = call(recorder, "register", base_url, "/auth/register", {
+        "email": email, "password": password, "_t": (time.time() - 10) * 1000
+    }, headers=headers)
+    if registered is None:
+        return
+    login = call(recorder, "login", base_url, "/auth/login", {"email": email, "password": password})
+    if login is None:
+        return
+    token = login["token"]
+
+    parsed = call(recorder, "parse_meal_smart", base_url, "/parse-meal-smart", {"text": meal_text}, token)
+    if parsed is None:
+        return
+    meal = [food for food in map(choose_food, parsed.get("items", [])) if food]
+    if not meal:
+        return
+
+    call(recorder, "calculate_gl", base_url, "/calculate-gl", {"meal": meal}, token)
+    call(recorder, "portion_info", base_url, "/portion-info", {"food": meal[0]["food"]}, token)
+
+
+def scrape_db_queries(base_url):
+    """Mean SQL statements per request for each endpoint, from the app's /metrics"""
+    scrape = urllib.request.Request(f"{base_url}/metrics", headers={"Authorization": f"Bearer {METRICS_TOKEN}"})
+    with urllib.request.urlopen(scrape, timeout=10) as response:
+        text = response.read().decode()
+
+    sums, counts = {}, {}
+    for line in text.splitlines():
+        for suffix, target in (("_sum", sums), ("_count", counts)):
+            prefix = f"gicalc_db_queries_per_request{suffix}{{endpoint=\""
+            if line.startswith(prefix):
+                endpoint = line[len(prefix):line.index('"', len(prefix))]
+                target[endpoint] = float(line.rsplit(" ", 1)[1])
+    return {endpoint: sums[endpoint] / counts[endpoint] for endpoint in counts if counts[endpoint]}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float("nan")
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(recorder, elapsed, db_queries, args):
+    steps = {}
+    for step in STEPS:
+        latencies = sorted(recorder.latencies[step])
+        steps[step] = {
+            "requests": len(latencies),
+            "errors": dict(sorted(recorder.errors[step].items())),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "db_queries_per_request": round(db_queries.get(step, float("nan")), 2),
+        }
+    return {
+        "config": {
+            "flows": args.flows, "concurrency": args.concurrency, "workers": args.workers,
+            "latency": args.latency, "jitter": args.jitter, "seed": args.seed,
+            "database": "postgresql" if (args.database_url or "").startswith("postgres") else "sqlite",
+        },
+        "elapsed_seconds": round(elapsed, 2),
+        "flows_per_second": round(args.flows / elapsed, 2),
+        "steps": steps,
+    }
+
+
+def report(results, baseline=None):
+    print(f"{results['config']}")
+    print(f"{results['flows_per_second']:.2f} flows/s ({results['elapsed_seconds']:.1f}s)")
+    print(f"{'step':<18} {'req':>5} {'err':>4} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for step, stats in results["steps"].items():
+        line = (f"{step:<18} {stats['requests']:5d} {sum(stats['errors'].values()):4d} {stats['throughput_rps']:7.2f} "
+                f"{stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f} {stats['db_queries_per_request']:8.2f}")
+        if baseline and step in baseline["steps"]:
+            base_p95 = baseline["steps"][step]["p95_ms"]
+            if base_p95:
+                line += f"   p95 {100 * (stats['p95_ms'] - base_p95) / base_p95:+.1f}% vs baseline"
+        if stats["errors"]:
+            line += "   errors " + ", ".join(f"{status} x{count}" for status, count in stats["errors"].items())
+        print(line)
+
+
+def regressions(results, baseline, tolerance):
+    """Steps whose p95 latency or throughput are worse than the baseline by more than tolerance"""
+    found = []
+    for step, stats in results["steps"].items():
+        base = baseline["steps"].get(step)
+        if not base:
+            continue
+        if base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            found.append(f"{step}: p95 {stats['p95_ms']}ms vs {base['p95_ms']}ms")
+        if base["throughput_rps"] and stats["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            found.append(f"{step}: {stats['throughput_rps']} req/s vs {base['throughput_rps']} req/s")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flows", type=int, default=200, help="user flows to run (one new user each)")
+    parser.add_argument("--concurrency", type=int, default=20, help="flows in flight at once")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--latency", type=float, default=0.8, help="fake OpenAI base latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.4, help="fake OpenAI extra random latency (seconds)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="e.g. postgresql://localhost/gicalc_bench (default: temp SQLite file)")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--openai-port", type=int, default=5056)
+    parser.add_argument("--save", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a results JSON written by --save")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression vs baseline (0.2 = 20%%)")
+    parser.add_argument("--keep-logs", action="store_true", help="keep the temp directory with server.log")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(f"127.0.0.1:{args.port}", args.workers)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="gicalc-bench-")
+    processes, base_url = start_processes(args, workdir)
+    if args.keep_logs:
+        print(f"server log: {os.path.join(workdir, 'server.log')}")
+    try:
+        rng = random.Random(args.seed)
+        meals = [rng.choice(MEALS) for _ in range(args.flows)]
+        run_id = f"{int(time.time())}-{os.getpid()}"
+        recorder = StepRecorder()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for index, meal_text in enumerate(meals):
+                pool.submit(run_flow, recorder, base_url, run_id, index, meal_text)
+        elapsed = time.perf_counter() - started
+
+        results = summarize(recorder, elapsed, scrape_db_queries(base_url), args)
+    finally:
+        stop_processes(processes)
+        if not args.keep_logs:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if baseline:
+        found = regressions(results, baseline, args.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Local OpenAI-compatible stand-in for benchmarks.
+
+Serves POST /v1/chat/completions with canned JSON answers for every prompt
+app.py sends (meal parsing, fused parse-and-estimate, single and batched
+nutrition estimates, suggestions, portion descriptions), after a configurable
+latency plus random jitter. Answers are derived from the request text, so the
+same meal always gets the same estimate, and the jitter comes from a seeded
+RNG.
+
+Usage:
+    python benchmarks/fake_openai.py [--port 5056] [--latency 0.8] [--jitter 0.4] [--seed 1]
+
+Point the app at it with OPENAI_API_KEY=sk-fake OPENAI_BASE_URL=http://127.0.0.1:5056/v1.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NUMBER_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s+(.*)$")
+QUOTED_PATTERN = re.compile(r'"([^"]+)"')
+CATALOG_PATTERN = re.compile(r"^Catalog foods: (\[.*\])$", re.MULTILINE)
+
+
+def stable_int(text, low, high):
+    """Deterministic pseudo-random integer in [low, high] for a piece of text"""
+    digest = hashlib.sha256(text.lower().encode()).digest()
+    return low + int.from_bytes(digest[:4], "big") % (high - low + 1)
+
+
+def parse_meal(meal_text):
+    meal = []
+    for part in re.split(r",| and ", meal_text):
+        part = part.strip()
+        if not part:
+            continue
+        match = NUMBER_PATTERN.match(part)
+        if match:
+            meal.append({"food": match.group(2).strip(), "quantity": float(match.group(1))})
+        else:
+            meal.append({"food": part, "quantity": 1})
+    return {"meal": meal}
+
+
+def parse_and_estimate(meal_text, catalog_names):
+    """Fused parse: catalog foods are marked, everything else comes with an inline estimate"""
+    catalog = {name.lower(): name for name in catalog_names}
+    meal = parse_meal(meal_text)["meal"]
+    for item in meal:
+        item["catalog_food"] = catalog.get(item["food"].lower())
+        item["estimate"] = None if item["catalog_food"] else nutrition(item["food"])
+    return {"meal": meal}
+
+
+def nutrition(food_name):
+    return {
+        "name": food_name.title(),
+        "gi": stable_int(food_name, 35, 85),
+        "carbs_per_unit": stable_int(food_name + ":carbs", 10, 60),
+        "fiber_per_unit": stable_int(food_name + ":fiber", 0, 8),
+        "unit": "bowl",
+        "unit_desc": "1 bowl = 150g",
+        "grams_per_unit": 150,
+    }
+
+
+def answer(messages):
+    """Canned reply for one chat completion request, keyed off the app's prompts"""
+    system = messages[0]["content"] if messages else ""
+    user = messages[-1]["content"] if messages else ""
+
+    if user.startswith("Parse this meal:"):
+        catalog = CATALOG_PATTERN.search(system)
+        if catalog:
+            return parse_and_estimate(user.split(":", 1)[1], json.loads(catalog.group(1)))
+        return parse_meal(user.split(":", 1)[1])
+    if user.startswith("Get nutrition info for each of:"):
+        return {"items": [nutrition(name) for name in json.loads(user.split(":", 1)[1])]}
+    if user.startswith("Get nutrition info for:"):
+        return nutrition(user.split(":", 1)[1].strip())
+    if "suggestions" in system:
+        return {"suggestions": [
+            {"text": "Replace half the white rice with brown rice", "reason": "Brown rice has a lower GI"},
+            {"text": "Add a bowl of dal or salad first", "reason": "Fiber and protein slow glucose absorption"},
+        ]}
+    if "portion size" in system:
+        return {"unit_desc": "1 serving = 1 medium bowl (about 150g)"}
+    quoted = QUOTED_PATTERN.search(user)
+    if quoted:
+        return nutrition(quoted.group(1))
+    return {}
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = body.get("messages", [])
+        server = self.server
+
+        with server.rng_lock:
+            delay = server.latency + server.rng.uniform(0, server.jitter)
+        time.sleep(delay)
+
+        content = json.dumps(answer(messages))
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        payload = json.dumps({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }).encode()
+
+        with server.rng_lock:
+            server.calls += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def create_server(host="127.0.0.1", port=5056, latency=0.8, jitter=0.4, seed=1):
+    server = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.rng = random.Random(seed)
+    server.rng_lock = threading.Lock()
+    server.calls = 0
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--latency", type=float, default=0.8, help="base seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.4, help="extra uniform random seconds per completion")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.latency, args.jitter, args.seed)
+    print(f"fake OpenAI on http://{args.host}:{args.port}/v1 (latency {args.latency}s + up to {args.jitter}s)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
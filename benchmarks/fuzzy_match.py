@@ -0,0 +1,138 @@
+"""Benchmark the local fuzzy food matcher.
+
+Measures fuzzy_match_food latency and counts how many misspelled/variant food
+names now resolve to a curated food instead of falling through to
+get_nutrition_from_ai / get_ai_food_estimation (one OpenAI call each).
+
+Usage:
+    python benchmarks/fuzzy_match.py [--scale 20000] [--seed 7]
+
+--scale pads the catalog with synthetic foods to show how latency holds up as
+the catalog grows. Runs against an in-memory SQLite database; no OpenAI key needed.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SESSION_SECRET", "benchmark-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import logging  # noqa: E402
+
+logging.disable(logging.INFO)
+
+import app as gl_app  # noqa: E402
+
+# Real-world spellings seen in meal text, with the curated food they should resolve to
+KNOWN_VARIANTS = [
+    ("jowar rotti", "Jowar Roti"),
+    ("poori's", "Poori"),
+    ("pooris", "Poori"),
+    ("masoor dhal", "Masoor Dal"),
+    ("daal fry", "Dal Fry"),
+    ("paneer sabzi", "Paneer Sabji"),
+    ("bhindi fry", "Bhindi (Okra) Fry"),
+    ("akki roti", "Akki Roti (Rice Flour)"),
+    ("poha", "Poha (Flattened Rice)"),
+    ("bananas", "Banana"),
+    ("apples", "Apple"),
+    ("mangoes", "Mango"),
+    ("brown rise", "Brown Rice"),
+    ("white ryce", "White Rice"),
+    ("lemon rce", "Lemon Rice"),
+]
+
+# Foods that are not in the catalog and must still go to the AI
+UNKNOWN_FOODS = [
+    "chicken biryani", "gulab jamun", "masala chai", "pav bhaji", "vada pav",
+    "paneer tikka", "aloo paratha", "rasgulla", "samosa", "curd rice",
+    "pani puri", "dhokla", "medu vada", "malai kofta", "jalebi",
+]
+
+
+def make_typo(name, rng):
+    """Apply one random keyboard-style edit to a food name"""
+    name = name.lower()
+    letters = [i for i, char in enumerate(name) if char.isalpha()]
+    if not letters:
+        return name
+    i = rng.choice(letters)
+    edit = rng.choice(["delete", "double", "swap", "vowel"])
+    if edit == "delete":
+        return name[:i] + name[i + 1:]
+    if edit == "double":
+        return name[:i] + name[i] + name[i:]
+    if edit == "swap" and i + 1 < len(name) and name[i + 1].isalpha():
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    vowels = "aeiou"
+    replacement = rng.choice([v for v in vowels if v != name[i]]) if name[i] in vowels else name[i]
+    return name[:i] + replacement + name[i + 1:]
+
+
+def pad_catalog(size, rng):
+    """Append synthetic foods so the fuzzy index covers `size` entries"""
+    foods = list(gl_app.food_catalog.foods)
+    while len(foods) < size:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(rng.randint(1, 3))]
+        foods.append({
+            "name": " ".join(words).title(), "category": "Synthetic", "gi": 50, "unit": "serving",
+            "unit_desc": "1 serving = 100g", "carbs_per_unit": 20, "fiber_per_unit": 2,
+        })
+    gl_app.food_catalog = gl_app.FoodCatalog(foods, "padded")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(scale, seed):
+    rng = random.Random(seed)
+    curated = [food["name"] for food in gl_app.food_catalog.foods]
+
+    cases = list(KNOWN_VARIANTS)
+    cases += [(make_typo(name, rng), name) for name in curated for _ in range(3)]
+    cases += [(name, None) for name in UNKNOWN_FOODS]
+    # Only names that miss the exact lookup would ever reach the AI
+    cases = [(query, expected) for query, expected in cases if query.lower() not in gl_app.food_catalog.lookup]
+
+    if scale:
+        pad_catalog(scale, rng)
+
+    latencies = []
+    resolved_correct = resolved_wrong = unresolved_known = unknown_resolved = 0
+    for query, expected in cases:
+        start = time.perf_counter()
+        food, _ = gl_app.fuzzy_match_food(gl_app.food_catalog, query)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        if expected is None:
+            unknown_resolved += food is not None
+        elif food is None:
+            unresolved_known += 1
+        elif food["name"] == expected:
+            resolved_correct += 1
+        else:
+            resolved_wrong += 1
+
+    known_total = sum(1 for _, expected in cases if expected is not None)
+    print(f"catalog size:            {len(gl_app.food_catalog.foods)}")
+    print(f"queries (lookup misses): {len(cases)} ({known_total} misspelled curated, {len(cases) - known_total} unknown)")
+    print(f"latency ms p50/p95/max:  {statistics.median(latencies):.3f} / {percentile(latencies, 95):.3f} / {max(latencies):.3f}")
+    print(f"resolved correctly:      {resolved_correct}/{known_total} -> AI calls avoided")
+    print(f"resolved to wrong food:  {resolved_wrong}")
+    print(f"left for AI (curated):   {unresolved_known}")
+    print(f"unknown foods captured:  {unknown_resolved}/{len(cases) - known_total} (should be 0)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=0, help="pad the catalog to this many foods")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.scale, args.seed)
@@ -0,0 +1,108 @@
+"""Benchmark password verification throughput (logins per second per core).
+
+Compares check_password_hash run inline on the calling thread (the old
+User.check_password) with verify_password, which runs it in the bounded
+process pool. A login storm is simulated with --concurrency threads; logins
+that can't get a pool slot within PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS are shed
+(503). While the storm runs, a lightweight probe request is timed to show
+whether other work still gets CPU time.
+
+Usage:
+    python benchmarks/password_hashing.py [--logins 200] [--concurrency 16]
+        [--method scrypt:32768:8:1] [--workers N]
+
+Runs against an in-memory SQLite database; no OpenAI key needed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SESSION_SECRET", "benchmark-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import logging  # noqa: E402
+
+logging.disable(logging.INFO)
+
+import app as gl_app  # noqa: E402
+from werkzeug.security import check_password_hash, generate_password_hash  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+
+def probe_latency_ms(stop):
+    """Time a small CPU-bound task repeatedly (stands in for a /calculate-gl request)"""
+    samples = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        sum(i * i for i in range(20000))
+        samples.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.01)
+    return samples
+
+
+def attempt_login(verify, password_hash):
+    try:
+        assert verify(password_hash, PASSWORD)
+        return True
+    except gl_app.PasswordHashingBusy:
+        return False
+
+
+def storm(verify, password_hash, logins, concurrency):
+    stop = threading.Event()
+    probe_samples = []
+    probe = threading.Thread(target=lambda: probe_samples.extend(probe_latency_ms(stop)))
+    probe.start()
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: attempt_login(verify, password_hash), range(logins)))
+    finally:
+        stop.set()
+        probe.join()
+    elapsed = time.perf_counter() - started
+
+    return elapsed, results.count(True), probe_samples
+
+
+def report(label, elapsed, accepted, logins, cores, probe_samples):
+    per_second = accepted / elapsed
+    probe_p50 = statistics.median(probe_samples) if probe_samples else float("nan")
+    print(f"{label:<8} {per_second:8.1f} logins/s  {per_second / cores:7.1f} per core  "
+          f"{logins - accepted:4d} shed (503)  probe p50 {probe_p50:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous login requests")
+    parser.add_argument("--method", default=gl_app.PASSWORD_HASH_METHOD, help="werkzeug hash method and cost")
+    parser.add_argument("--workers", type=int, default=gl_app.PASSWORD_HASH_WORKERS, help="process pool size")
+    args = parser.parse_args()
+
+    gl_app.PASSWORD_HASH_METHOD = args.method
+    gl_app.PASSWORD_HASH_WORKERS = args.workers
+    gl_app.password_hash_slots = threading.BoundedSemaphore(args.workers * 4)
+    password_hash = generate_password_hash(PASSWORD, method=args.method)
+
+    print(f"method {args.method}, {args.logins} logins, concurrency {args.concurrency}, pool workers {args.workers}")
+
+    # Warm the pool so worker start-up isn't billed to the first logins
+    gl_app.verify_password(password_hash, PASSWORD)
+
+    elapsed, accepted, probe = storm(check_password_hash, password_hash, args.logins, args.concurrency)
+    report("inline", elapsed, accepted, args.logins, os.cpu_count() or 1, probe)
+
+    elapsed, accepted, probe = storm(gl_app.verify_password, password_hash, args.logins, args.concurrency)
+    report("pool", elapsed, accepted, args.logins, args.workers, probe)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Benchmark the sliding-window rate limiter.
+
+Drives check_per_minute_limit-style traffic (limit 10 per 60s) across a large
+number of distinct keys and reports throughput, memory per tracked key and how
+long the sweeper takes to drop idle counters once their windows have passed.
+The old list-of-datetimes tracker is measured on the same traffic for
+comparison (it never drops keys).
+
+Usage:
+    python benchmarks/rate_limiter.py [--keys 1000000] [--hits-per-key 3]
+    python benchmarks/rate_limiter.py --backend database --keys 20000
+
+The database backend runs against DATABASE_URL (an in-memory SQLite database
+by default); no OpenAI key needed.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SESSION_SECRET", "benchmark-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import logging  # noqa: E402
+
+logging.disable(logging.INFO)
+
+import app as gl_app  # noqa: E402
+
+LIMIT = 10
+WINDOW_SECONDS = 60
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def legacy_check(timestamps, key):
+    """The previous per-minute check: rebuild the key's list of datetimes on every call"""
+    now = datetime.utcnow()
+    one_minute_ago = now - timedelta(minutes=1)
+    if key not in timestamps:
+        timestamps[key] = []
+    timestamps[key] = [ts for ts in timestamps[key] if ts > one_minute_ago]
+    if len(timestamps[key]) >= LIMIT:
+        return False, len(timestamps[key])
+    timestamps[key].append(now)
+    return True, len(timestamps[key])
+
+
+def drive(check, keys, hits_per_key):
+    started = time.perf_counter()
+    for _ in range(hits_per_key):
+        for key in keys:
+            check(key)
+    return time.perf_counter() - started
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def run_memory(keys, hits_per_key):
+    clock = FakeClock()
+    limiter = gl_app.InMemoryRateLimiter(clock=clock)
+
+    elapsed = drive(lambda key: limiter.apply(key, LIMIT, WINDOW_SECONDS, True), keys, hits_per_key)
+    total_hits = len(keys) * hits_per_key
+    print(f"sliding window: {total_hits / elapsed:,.0f} checks/s ({elapsed:.2f}s for {total_hits:,})")
+
+    def build():
+        fresh = gl_app.InMemoryRateLimiter(clock=clock)
+        drive(lambda key: fresh.apply(key, LIMIT, WINDOW_SECONDS, True), keys, hits_per_key)
+        return fresh
+
+    fresh, used = measure_memory(build)
+    print(f"sliding window: {used / len(keys):.0f} bytes/key, {fresh.size():,} keys tracked")
+
+    clock.now += 2 * WINDOW_SECONDS
+    started = time.perf_counter()
+    removed = fresh.sweep()
+    print(f"sweep:          removed {removed:,} idle keys in {time.perf_counter() - started:.2f}s, {fresh.size():,} left")
+
+    timestamps = {}
+    elapsed = drive(lambda key: legacy_check(timestamps, key), keys, hits_per_key)
+    print(f"legacy lists:   {total_hits / elapsed:,.0f} checks/s ({elapsed:.2f}s for {total_hits:,})")
+    legacy_store, used = measure_memory(lambda: _legacy_build(keys, hits_per_key))
+    print(f"legacy lists:   {used / len(keys):.0f} bytes/key, {len(legacy_store):,} keys tracked (never swept)")
+
+
+def _legacy_build(keys, hits_per_key):
+    timestamps = {}
+    drive(lambda key: legacy_check(timestamps, key), keys, hits_per_key)
+    return timestamps
+
+
+def run_database(keys, hits_per_key):
+    clock = FakeClock()
+    limiter = gl_app.DatabaseRateLimiter(clock=clock)
+    with gl_app.app.app_context():
+        elapsed = drive(lambda key: limiter.apply(key, LIMIT, WINDOW_SECONDS, True), keys, hits_per_key)
+        total_hits = len(keys) * hits_per_key
+        print(f"database:       {total_hits / elapsed:,.0f} checks/s ({elapsed:.2f}s for {total_hits:,})")
+        print(f"database:       {limiter.size():,} counter rows")
+
+        clock.now += 2 * WINDOW_SECONDS
+        started = time.perf_counter()
+        removed = limiter.sweep()
+        print(f"sweep:          removed {removed:,} idle rows in {time.perf_counter() - started:.2f}s, {limiter.size():,} left")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "database"], default="memory")
+    parser.add_argument("--keys", type=int, default=1_000_000, help="distinct users/IPs")
+    parser.add_argument("--hits-per-key", type=int, default=3)
+    args = parser.parse_args()
+
+    keys = [f"minute:{i}" for i in range(args.keys)]
+    if args.backend == "memory":
+        run_memory(keys, args.hits_per_key)
+    else:
+        run_database(keys, args.hits_per_key)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Gunicorn settings, picked up automatically by `gunicorn main:app`.
+
+Workers default to gevent: a request waiting on OpenAI (or Postgres) yields
+to other requests instead of holding a whole worker, so one instance can keep
+hundreds of AI calls in flight. Set GUNICORN_WORKER_CLASS=sync for the old
+one-request-per-worker behaviour.
+
+Prometheus metrics run in multiprocess mode: every worker writes its samples
+under PROMETHEUS_MULTIPROC_DIR and /metrics sums them, whichever worker
+serves the scrape.
+
+Password hashing pools are sized per instance: PASSWORD_HASH_WORKERS defaults
+to the CPU count divided by the number of gunicorn workers.
+"""
+import os
+import shutil
+import tempfile
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "1000"))  # Concurrent requests per gevent worker
+
+if worker_class == "gevent":
+    # Let the per-request AI fan-out use greenlets freely (see AI_LOOKUP_MAX_WORKERS in app.py)
+    os.environ.setdefault("AI_LOOKUP_MAX_WORKERS", "256")
+    os.environ.setdefault("AI_HTTP_MAX_CONNECTIONS", "256")  # Matching OpenAI connection pool
+
+# Must be set before app.py (and prometheus_client) is imported in the workers
+prometheus_multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "gicalc-prometheus")
+)
+
+
+def gevent_wait_callback(conn, timeout=None):
+    """psycopg2 wait callback that yields to other greenlets while Postgres is busy"""
+    import psycopg2
+    from psycopg2 import extensions
+    from gevent.socket import wait_read, wait_write
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+
+def post_fork(server, worker):
+    if worker_class != "gevent":
+        return
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        return
+    extensions.set_wait_callback(gevent_wait_callback)
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be summed into the new one
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+    # Every worker runs its own password hashing pool: split the CPUs between workers
+    # instead of letting each one start a KDF process per CPU
+    os.environ.setdefault(
+        "PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // server.cfg.workers))
+    )
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)